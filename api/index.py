@@ -1,69 +1,105 @@
 from flask import Flask, request, jsonify
 import pandas as pd
 import numpy as np
+import threading
 from main import (
-    detect_duplicate_payments,
-    detect_unusual_timing,
-    detect_round_number_abuse,
-    detect_threshold_avoidance,
-    analyze_benford,
-    detect_fuzzy_duplicates
+    CSV_COLUMNS,
+    CSV_ENGINE,
+    prepare_transactions,
+    _read_frame,
+    run_detectors,
+    analyze_benford_groups,
+    detect_fuzzy_duplicates,
+    VendorIndex
 )
 
 app = Flask(__name__)
 
+# One warm vendor index per process: every analyzed batch adds its vendors,
+# and single vendors can be checked against them as transactions arrive
+vendor_index = VendorIndex()
+vendor_index_lock = threading.Lock()
+
+def _records(frame):
+    # Missing values as None, since NaN is not valid JSON
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
     try:
-        data = request.json
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
+        upload = request.files.get('file')
+        if upload:
+            # CSV export as a multipart 'file' field, plain or gzip/zstd/zip compressed;
+            # it is decompressed while parsing, straight from the upload stream. Unlike
+            # load_transactions, read errors reach the client instead of only the log
+            try:
+                df = prepare_transactions(_read_frame(upload.stream, CSV_COLUMNS, CSV_ENGINE)[0])
+            except ValueError as e:
+                return jsonify({"error": f"Could not read uploaded file: {e}"}), 400
+        else:
+            data = request.get_json(silent=True)
+            if not data:
+                return jsonify({"error": "No data provided"}), 400
 
-        # Convert to DataFrame
-        # Expecting input: [{"date": "...", "amount": 123, "vendor": "..."}, ...]
-        df = pd.DataFrame(data)
+            # Convert to DataFrame
+            # Expecting input: [{"date": "...", "amount": 123, "vendor": "..."}, ...]
+            df = pd.DataFrame(data)
         
-        # Data Cleaning
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        
-        if 'amount' in df.columns:
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+            # Data Cleaning - typed ingest parses date and amount once for all detectors
+            df = prepare_transactions(df)
             
+        if df.empty:
+            return jsonify({"error": "No valid data after parsing"}), 400
+
         # Drop invalid rows
         df = df.dropna(subset=['date', 'amount'])
         
         if df.empty:
             return jsonify({"error": "No valid data after parsing"}), 400
 
-        # Run Detectors
-        # 1. Duplicates
-        duplicates = detect_duplicate_payments(df)
-        
-        # 2. Timing
-        unusual_timing = detect_unusual_timing(df)
-        
-        # 3. Round Numbers
-        round_numbers = detect_round_number_abuse(df)
-        
-        # 4. Threshold Avoidance - getting threshold from request or default
+        # Run Detectors - threshold from request or default
         threshold = request.args.get('threshold', default=10000, type=float) 
         # Alternatively check if it's in the body, but usually query params for config
         
-        threshold_flags = detect_threshold_avoidance(df, threshold=threshold)
+        # 1-4. Duplicates, timing, round numbers and threshold avoidance in one pass
+        results = run_detectors(df, threshold=threshold)
+        duplicates, unusual_timing, round_numbers, threshold_flags = (
+            results["flagged"][name]
+            for name in ["duplicates", "unusual_timing", "round_numbers", "threshold_flags"]
+        )
+        # Flagged rows are only copied out of the frame when details are requested
+        details = request.args.get('details', default='true').lower() != 'false'
+        threshold_details = []
+        if details and not threshold_flags.empty:
+            threshold_frame = threshold_flags.frame
+            if results["tiers"] is not None:
+                # With tiered limits each flag names the limit it stays under (None for split parts)
+                tiers = results["tiers"]
+                threshold_frame = threshold_frame.assign(tier=np.where(np.isnan(tiers), None, tiers))
+            threshold_details = _records(threshold_frame)
         
-        # 5. Benford
-        benford_analysis = analyze_benford(df)
-        # Convert Benford result to simple dict for JSON
-        benford_json = []
-        if not benford_analysis.empty:
-            # benford_analysis has 'Actual' and 'Expected' columns
-            # We want to send it as a list of points
-            benford_analysis['Digit'] = benford_analysis.index
-            benford_json = benford_analysis.to_dict(orient='records')
+        # 5. Benford - first digit, second digit, first-two and last-two digit tests
+        benford_tests = results["benford"].tests()
+        # Convert each Benford test to a list of points for JSON
+        benford_json = {}
+        for test in ["first_digit", "second_digit", "first_two_digits", "last_two_digits"]:
+            benford_json[test] = []
+            if test in benford_tests:
+                # analysis has 'Actual' and 'Expected' columns indexed by digit
+                benford_analysis = benford_tests[test]["analysis"]
+                benford_analysis['Digit'] = benford_analysis.index
+                benford_json[test] = benford_analysis.to_dict(orient='records')
+        benford_statistics = {test: result["statistics"] for test, result in benford_tests.items()}
+        # Most deviant vendors and accounts by first digit MAD
+        benford_vendors = analyze_benford_groups(df, by='vendor')
+        benford_accounts = analyze_benford_groups(df, by='account')
             
         # 6. Fuzzy Duplicates
         fuzzy_duplicates = detect_fuzzy_duplicates(df)
+        if 'vendor' in df.columns:
+            with vendor_index_lock:
+                for vendor in df['vendor'].dropna().unique():
+                    vendor_index.add(vendor)
         
         # Prepare Response
         response = {
@@ -75,11 +111,17 @@ def analyze():
                 "threshold_flags": len(threshold_flags)
             },
             "details": {
-                "duplicates": duplicates.to_dict(orient='records') if not duplicates.empty else [],
-                "unusual_timing": unusual_timing.to_dict(orient='records') if not unusual_timing.empty else [],
-                "round_numbers": round_numbers.to_dict(orient='records') if not round_numbers.empty else [],
-                "threshold_flags": threshold_flags.to_dict(orient='records') if not threshold_flags.empty else [],
-                "benford": benford_json,
+                "duplicates": _records(duplicates.frame) if details and not duplicates.empty else [],
+                "unusual_timing": _records(unusual_timing.frame) if details and not unusual_timing.empty else [],
+                "round_numbers": _records(round_numbers.frame) if details and not round_numbers.empty else [],
+                "threshold_flags": threshold_details,
+                "benford": benford_json["first_digit"],
+                "benford_second_digit": benford_json["second_digit"],
+                "benford_first_two_digits": benford_json["first_two_digits"],
+                "benford_last_two_digits": benford_json["last_two_digits"],
+                "benford_statistics": benford_statistics,
+                "benford_vendors": benford_vendors.to_dict(orient='records'),
+                "benford_accounts": benford_accounts.to_dict(orient='records'),
                 "fuzzy_duplicates": fuzzy_duplicates.to_dict(orient='records') if not fuzzy_duplicates.empty else []
             }
         }
@@ -89,6 +131,39 @@ def analyze():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/vendors/check', methods=['POST'])
+def check_vendor():
+    try:
+        data = request.json
+        if not data or not data.get('vendor'):
+            return jsonify({"error": "No vendor provided"}), 400
+
+        vendor = str(data['vendor'])
+        threshold = request.args.get('threshold', default=90, type=int)
+        # Register the vendor after the lookup unless the caller only wants to check it
+        register = request.args.get('register', default='true').lower() != 'false'
+
+        with vendor_index_lock:
+            known = vendor in vendor_index
+            matches = [
+                {"Vendor": name, "Similarity Score": score}
+                for name, score in vendor_index.query(vendor, threshold)
+                if name != vendor
+            ]
+            if register:
+                vendor_index.add(vendor)
+            known_vendors = len(vendor_index)
+
+        return jsonify({
+            "vendor": vendor,
+            "known": known,
+            "known_vendors": known_vendors,
+            "matches": matches
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Vercel requires 'app' to be exposed
 if __name__ == '__main__':
     app.run(debug=True)
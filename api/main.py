@@ -1,11 +1,34 @@
 import pandas as pd
 import numpy as np
+import bisect
+import glob
 import json
 import logging
 import os
+import sqlite3
+import sys
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from thefuzz import fuzz, process
 
+try:
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:
+    rf_fuzz = rf_process = None
+
+try:
+    import pyarrow
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = pc = pq = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # ----------------------------
 # Configuration
 # ----------------------------
@@ -18,6 +41,41 @@ else:
     config = {}
 
 THRESHOLD_AMOUNT = config.get("threshold_amount", 10000)
+DATE_FORMAT = config.get("date_format")
+CHUNK_SIZE = config.get("chunk_size")
+# Rows per chunk when iter_transactions is not given a chunk size
+STREAM_CHUNK_SIZE = 100000
+CSV_COLUMNS = config.get("csv_columns", ["transaction_id", "date", "amount", "description", "vendor", "account", "approved_by"])
+CSV_ENGINE = config.get("csv_engine", "c")
+# Low-cardinality text columns are read straight into categories
+CSV_DTYPES = {"vendor": "category", "account": "category", "approved_by": "category"}
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+# Compressed CSV exports are recognised by their leading bytes, not their names
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".zip")
+COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd", b"PK\x03\x04": "zip"}
+FLAGGED_OUTPUT = config.get("flagged_output")
+INGEST_WORKERS = config.get("ingest_workers", 4)
+DUPLICATE_HISTORY_PATH = config.get("duplicate_history_path")
+DUPLICATE_WINDOW_DAYS = config.get("duplicate_window_days")
+DUPLICATE_AMOUNT_TOLERANCE = config.get("duplicate_amount_tolerance", 0)
+THRESHOLD_LIMITS = config.get("threshold_limits")
+SPLIT_WINDOW_DAYS = config.get("split_window_days")
+SPLIT_GROUPS = config.get("split_groups", ["vendor", "approved_by"])
+DUPLICATE_FILTER_CAPACITY = config.get("duplicate_filter_capacity", 1000000)
+DUPLICATE_FILTER_FPR = config.get("duplicate_filter_fpr", 0.01)
+FUZZY_BLOCKING = config.get("fuzzy_blocking")
+FUZZY_NGRAM_SIZE = config.get("fuzzy_ngram_size", 3)
+FUZZY_BACKEND = config.get("fuzzy_backend", "thefuzz")
+FUZZY_WORKERS = config.get("fuzzy_workers", 1)
+FUZZY_CHUNK_SIZE = config.get("fuzzy_chunk_size", 256)
+FUZZY_PROCESSES = config.get("fuzzy_processes", 1)
+FUZZY_MINHASH_BANDS = config.get("fuzzy_minhash_bands", 32)
+FUZZY_MINHASH_ROWS = config.get("fuzzy_minhash_rows", 6)
+FUZZY_CACHE_PATH = config.get("fuzzy_cache_path")
+FUZZY_CACHE_MAX_VENDORS = config.get("fuzzy_cache_max_vendors", 100000)
+BENFORD_MIN_GROUP_SIZE = config.get("benford_min_group_size", 50)
+BENFORD_TOP_GROUPS = config.get("benford_top_groups", 10)
 
 # ----------------------------
 # Logging
@@ -31,101 +89,1965 @@ logging.basicConfig(filename='outputs/processing.log',
 # ----------------------------
 # Load transactions
 # ----------------------------
-def load_transactions(file_path):
+def parse_dates(values, date_format=DATE_FORMAT):
+    """
+    Parse date strings to datetime64[ns] with errors='coerce' semantics. Ledgers repeat a
+    few thousand distinct dates over millions of rows, so the distinct strings are parsed
+    once with an explicit or inferred format and broadcast back through their codes.
+    Returns a datetime64[ns] array; unparseable and missing values are NaT. Timezone-aware
+    dates keep their local wall-clock time, so a Sunday evening in New York stays a Sunday.
+    """
+    values = pd.Series(values) if not isinstance(values, (pd.Series, pd.Index)) else values
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _wall_clock(values)
+
+    sample = values[:5000]
+    if len(sample) > 0 and sample.nunique() > len(sample) // 2:
+        # Mostly distinct values, e.g. full timestamps: nothing to reuse
+        return _wall_clock(pd.to_datetime(values, format=date_format, errors='coerce'))
+
+    codes, uniques = pd.factorize(values)
+    if date_format is None and len(uniques) > 0 and isinstance(uniques[0], str):
+        # Same inference pd.to_datetime makes from the first value
+        date_format = pd.tseries.api.guess_datetime_format(uniques[0])
+    parsed = _wall_clock(pd.to_datetime(uniques, format=date_format, errors='coerce'))
+    # Missing values get code -1 and pick up the trailing NaT
+    return np.append(parsed, np.datetime64("NaT", "ns"))[codes]
+
+def _wall_clock(dates):
+    # Dropping the timezone keeps local time; converting to numpy directly would give UTC
+    if getattr(dates.dtype, "tz", None) is not None:
+        dates = dates.dt.tz_localize(None) if isinstance(dates, pd.Series) else dates.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ns]")
+
+def prepare_transactions(df, date_format=DATE_FORMAT):
+    """
+    Typed ingest: parse 'date' to datetime64[ns] and 'amount' to numbers once, so every
+    detector after it is a pure read. Values that do not parse become NaT/NaN.
+    Timezone-aware date columns are kept as they are; detectors read their local time.
+    Returns a new frame and leaves df untouched.
+    """
+    typed = {}
+    if 'date' in df.columns and df['date'].dtype != "datetime64[ns]" and getattr(df['date'].dtype, "tz", None) is None:
+        typed['date'] = parse_dates(df['date'], date_format)
+    if 'amount' in df.columns and not pd.api.types.is_numeric_dtype(df['amount']):
+        typed['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    return df.assign(**typed)
+
+def _compression(source):
+    """
+    Codec of a CSV path or seekable binary buffer from its leading bytes: 'gzip', 'zstd',
+    'zip', or None for plain text. read_csv decompresses these as it parses, so nothing
+    uncompressed is ever written to disk.
+    """
+    if hasattr(source, "read"):
+        position = source.tell()
+        head = source.read(4)
+        source.seek(position)
+    else:
+        with open(source, "rb") as f:
+            head = f.read(4)
+    codec = next((codec for magic, codec in COMPRESSION_MAGIC.items() if head.startswith(magic)), None)
+    if codec == "zstd" and zstandard is None:
+        raise ImportError("Reading .zst files needs the zstandard package: pip install zstandard")
+    return codec
+
+def _csv_options(file_path, columns=CSV_COLUMNS, engine=CSV_ENGINE, categorical=True):
+    """
+    read_csv arguments that load only the wanted columns (all of them when columns is None)
+    present in the file's header, with explicit dtypes for the text columns unless the
+    caller encodes them itself (categorical=False). file_path may be a path or a seekable
+    binary buffer, plain or compressed.
+    """
+    dtypes = CSV_DTYPES if categorical else {}
+    if engine == "pyarrow" and pyarrow is None:
+        raise ImportError("csv_engine 'pyarrow' needs the pyarrow package: pip install pyarrow")
+    compression = _compression(file_path)
+    if engine == "c" and columns is not None:
+        # The C parser takes a column filter and ignores dtypes for absent columns, which
+        # saves opening the file twice; that adds up over a directory of small exports
+        wanted = set(columns)
+        return {"usecols": lambda column: column in wanted, "dtype": dtypes, "engine": engine, "compression": compression}
+    position = file_path.tell() if hasattr(file_path, "read") else None
+    header = pd.read_csv(file_path, nrows=0, compression=compression).columns
+    if position is not None:
+        file_path.seek(position)
+    usecols = [column for column in header if columns is None or column in columns]
+    dtype = {column: kind for column, kind in dtypes.items() if column in usecols}
+    return {"usecols": usecols, "dtype": dtype, "engine": engine, "compression": compression}
+
+def _arrow_date_bounds(field, date_range):
+    """
+    Typed Arrow scalars for an inclusive (start, end) date range on a date or timestamp
+    field, so the comparison runs in the reader; None for either end that is open.
+    Returns None when the field cannot be compared without parsing it first.
+    """
+    if not (pyarrow.types.is_timestamp(field.type) or pyarrow.types.is_date(field.type)):
+        return None
+    bounds = []
+    for value in date_range:
+        if value is None:
+            bounds.append(None)
+            continue
+        value = pd.Timestamp(value)
+        if pyarrow.types.is_timestamp(field.type) and field.type.tz is not None and value.tz is None:
+            # Naive bounds are local times in the column's timezone, as in _filter_dates
+            value = value.tz_localize(field.type.tz)
+        value = value.date() if pyarrow.types.is_date(field.type) else value.to_pydatetime()
+        bounds.append(pyarrow.scalar(value, type=field.type))
+    return bounds
+
+def _arrow_columns(schema, columns):
+    return [name for name in schema.names if columns is None or name in columns]
+
+def _read_parquet(file_path, columns, date_range):
+    """
+    Parquet with column projection and, for date or timestamp columns, the date range
+    pushed down as a filter so row groups outside it are skipped from their statistics.
+    Text columns named in CSV_DTYPES come back as categoricals.
+    """
+    schema = pq.read_schema(file_path)
+    names = _arrow_columns(schema, columns)
+    filters = None
+    bounds = _arrow_date_bounds(schema.field('date'), date_range) if date_range and 'date' in names else None
+    if bounds:
+        start, end = bounds
+        filters = []
+        if start is not None:
+            filters.append(('date', '>=', start))
+        if end is not None:
+            filters.append(('date', '<=', end))
+        filters = filters or None
+    table = pq.read_table(file_path, columns=names, filters=filters, memory_map=True,
+                          read_dictionary=[name for name in CSV_DTYPES if name in names])
+    return table.to_pandas(), bounds is not None
+
+def _read_arrow(file_path, columns, date_range):
+    """
+    Arrow IPC (Feather v2) file or stream, memory-mapped so only the projected columns
+    and the rows inside the date range are ever copied out of the page cache. Compressed
+    files still work, but their buffers have to be decompressed into memory.
+    """
+    with pyarrow.memory_map(file_path, 'r') as source:
+        try:
+            table = pyarrow.ipc.open_file(source).read_all()
+        except pyarrow.ArrowInvalid:
+            source.seek(0)
+            table = pyarrow.ipc.open_stream(source).read_all()
+        table = table.select(_arrow_columns(table.schema, columns))
+        bounds = None
+        if date_range and 'date' in table.column_names:
+            bounds = _arrow_date_bounds(table.schema.field('date'), date_range)
+        if bounds:
+            start, end = bounds
+            keep = None
+            if start is not None:
+                keep = pc.greater_equal(table['date'], start)
+            if end is not None:
+                below = pc.less_equal(table['date'], end)
+                keep = below if keep is None else pc.and_(keep, below)
+            if keep is not None:
+                table = table.filter(keep)
+        df = table.to_pandas()
+    for name, kind in CSV_DTYPES.items():
+        if name in df.columns:
+            df[name] = df[name].astype(kind)
+    return df, bounds is not None
+
+def _source_paths(source):
+    """
+    Files behind a directory or glob pattern, sorted; None when source is a single file.
+    """
+    if hasattr(source, "read"):
+        return None
+    source = str(source)
+    if os.path.isfile(source):
+        # A file whose name happens to contain glob characters, e.g. GL[entity1].csv
+        return None
+    if os.path.isdir(source):
+        suffixes = (".csv",) + PARQUET_SUFFIXES + ARROW_SUFFIXES + COMPRESSED_SUFFIXES
+        paths = [os.path.join(source, name) for name in os.listdir(source) if name.lower().endswith(suffixes)]
+    elif glob.has_magic(source):
+        paths = [path for path in glob.glob(source) if os.path.isfile(path)]
+    else:
+        return None
+    if not paths:
+        raise FileNotFoundError(f"No transaction files found for {source}")
+    return sorted(paths)
+
+def _with_provenance(df, file_path):
+    # Trace every row back to its file and its 1-based data row (the header is not counted)
+    return df.assign(source_file=os.path.basename(file_path), source_row=np.arange(1, len(df) + 1))
+
+def _read_frame(file_path, columns, engine, date_range=None, categorical=True):
+    """
+    One file as read from disk, before typing: (frame, whether date_range was applied).
+    """
+    suffix = "" if hasattr(file_path, "read") else os.path.splitext(str(file_path))[1].lower()
+    if suffix in PARQUET_SUFFIXES + ARROW_SUFFIXES:
+        if pyarrow is None:
+            raise ImportError(f"Reading {suffix} files needs the pyarrow package: pip install pyarrow")
+        reader = _read_parquet if suffix in PARQUET_SUFFIXES else _read_arrow
+        return reader(file_path, columns, date_range)
+    return pd.read_csv(file_path, **_csv_options(file_path, columns, engine, categorical)), False
+
+def _read_chunks(file_path, chunk_size, columns):
+    """
+    One file as untyped frames of at most chunk_size rows. CSVs go through the C parser;
+    Parquet is read a batch at a time and Arrow IPC a record batch at a time, so neither
+    is loaded whole.
+    """
+    suffix = "" if hasattr(file_path, "read") else os.path.splitext(str(file_path))[1].lower()
+    if suffix not in PARQUET_SUFFIXES + ARROW_SUFFIXES:
+        yield from pd.read_csv(file_path, chunksize=chunk_size, **_csv_options(file_path, columns, engine="c"))
+        return
+    if pyarrow is None:
+        raise ImportError(f"Reading {suffix} files needs the pyarrow package: pip install pyarrow")
+    with pyarrow.memory_map(str(file_path), 'r') as source:
+        if suffix in PARQUET_SUFFIXES:
+            parquet = pq.ParquetFile(source)
+            batches = parquet.iter_batches(batch_size=chunk_size, columns=_arrow_columns(parquet.schema_arrow, columns))
+        else:
+            try:
+                reader = pyarrow.ipc.open_file(source)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            except pyarrow.ArrowInvalid:
+                source.seek(0)
+                batches = pyarrow.ipc.open_stream(source)
+        for batch in batches:
+            batch = batch.select(_arrow_columns(batch.schema, columns))
+            # Record batches are as large as the writer made them
+            for start in range(0, batch.num_rows, chunk_size):
+                df = batch.slice(start, chunk_size).to_pandas()
+                for name, kind in CSV_DTYPES.items():
+                    if name in df.columns:
+                        df[name] = df[name].astype(kind)
+                yield df
+
+def _filter_dates(df, date_range):
+    start, end = (pd.Timestamp(value) if value is not None else None for value in date_range)
+    tz = getattr(df['date'].dtype, "tz", None)
+    if tz is not None:
+        # Naive bounds are local times in the column's timezone
+        start, end = (value.tz_localize(tz) if value is not None and value.tz is None else value for value in (start, end))
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= df['date'] >= start
+    if end is not None:
+        keep &= df['date'] <= end
+    return df[keep]
+
+def load_transactions(file_path, columns=CSV_COLUMNS, engine=CSV_ENGINE, date_range=None, workers=INGEST_WORKERS):
+    """
+    Load a CSV, Parquet (.parquet, .pq) or Arrow IPC (.arrow, .feather, .ipc) ledger into a
+    typed frame with only the wanted columns. date_range is an inclusive (start, end)
+    pair, either end may be None; Parquet and Arrow apply it in the reader when 'date' is
+    stored as a date or timestamp, everything else filters after parsing.
+    CSVs may be gzip, zstd or single-file zip compressed, and may be passed as an open
+    binary file such as an upload.
+    file_path may also be a directory or a glob pattern: the files are parsed by a pool of
+    `workers` threads and concatenated in path order, with 'source_file' and 'source_row'
+    columns so every finding can be traced back to its file.
+    """
     try:
-        df = pd.read_csv(file_path)
-        print(f"Loaded {len(df)} transactions from {file_path}")
-        logging.info(f"Loaded {len(df)} transactions from {file_path}")
+        paths = _source_paths(file_path)
+        if paths is None:
+            df, filtered = _read_frame(file_path, columns, engine, date_range)
+            df = prepare_transactions(df)
+        else:
+            # Row numbers are only known when every row comes out of the reader, so the
+            # date filter runs after concatenation, as does the typing: dates, amounts and
+            # categories are encoded once for all files instead of once per file
+            def read(path):
+                return _with_provenance(_read_frame(path, columns, engine, categorical=False)[0], path)
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+                frames = list(pool.map(read, paths))
+            df = pd.concat(frames, ignore_index=True)
+            filtered = False
+            for name, kind in {**CSV_DTYPES, "source_file": "category"}.items():
+                if name in df.columns:
+                    df[name] = df[name].astype(kind)
+            df = prepare_transactions(df)
+        if date_range and not filtered:
+            df = _filter_dates(df, date_range)
+        source = (getattr(file_path, "name", None) or "uploaded file") if hasattr(file_path, "read") else file_path
+        print(f"Loaded {len(df)} transactions from {source}")
+        logging.info(f"Loaded {len(df)} transactions from {source}" + (f" ({len(paths)} files)" if paths else ""))
         return df
     except Exception as e:
-        print(f"Error loading CSV: {e}")
-        logging.error(f"Error loading CSV: {e}")
+        print(f"Error loading transactions: {e}")
+        logging.error(f"Error loading transactions: {e}")
         return pd.DataFrame()
 
+def iter_transactions(file_path, chunk_size=CHUNK_SIZE, columns=CSV_COLUMNS):
+    """
+    Streaming counterpart of load_transactions: yields typed frames of at most chunk_size
+    rows, so files larger than memory can be processed chunk by chunk. CSVs always use
+    the C parser, since the pyarrow engine cannot read in chunks, and compressed CSVs are
+    decompressed block by block as the chunks are parsed; Parquet and Arrow IPC files are
+    read batch by batch. A directory or glob is streamed
+    file by file, with the same provenance columns as load_transactions. Without a
+    chunk_size, chunks of STREAM_CHUNK_SIZE rows are used.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    paths = _source_paths(file_path)
+    rows = 0
+    for path in paths or [file_path]:
+        file_rows = 0
+        for chunk in _read_chunks(path, chunk_size, columns):
+            chunk = prepare_transactions(chunk)
+            if paths is not None:
+                chunk = _with_provenance(chunk, path).assign(source_row=np.arange(file_rows + 1, file_rows + len(chunk) + 1))
+            file_rows += len(chunk)
+            yield chunk
+        rows += file_rows
+    print(f"Streamed {rows} transactions from {file_path}")
+    logging.info(f"Streamed {rows} transactions from {file_path} in chunks of {chunk_size}")
+
 # ----------------------------
 # Anomaly Detection Functions
 # ----------------------------
-def detect_duplicate_payments(df):
+class FlaggedRows:
+    """
+    Rows of a frame flagged by a detector, kept as row positions. len() is the number of
+    flagged rows; the rows themselves are only copied out of the frame when .frame is used.
+    """
+
+    def __init__(self, df, flagged):
+        self.df = df
+        flagged = np.asarray(flagged)
+        self.indices = np.flatnonzero(flagged) if flagged.dtype == bool else flagged
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def empty(self):
+        return len(self.indices) == 0
+
+    @property
+    def frame(self):
+        if not hasattr(self, "_frame"):
+            self._frame = self.df.iloc[self.indices]
+        return self._frame
+
+def detect_duplicate_payments_mask(df, history=DUPLICATE_HISTORY_PATH, window_days=DUPLICATE_WINDOW_DAYS,
+                                   amount_tolerance=DUPLICATE_AMOUNT_TOLERANCE):
+    """
+    Boolean mask of payments sharing date, amount and vendor with another payment, in df
+    or, when history (a PaymentHistory or a path to one) is given, in an earlier batch.
+    With window_days set, payments to the same vendor within that many days of each
+    other and within amount_tolerance of the same amount are flagged too.
+    """
     # Mapping 'Payee' logic to 'vendor' and 'Date' to 'date'
-    duplicates = df[df.duplicated(subset=['date', 'amount', 'vendor'], keep=False)]
+    mask = df.duplicated(subset=['date', 'amount', 'vendor'], keep=False).to_numpy()
+    if window_days is not None:
+        mask = mask | _near_duplicate_mask(df, window_days, amount_tolerance)
+    if history is not None:
+        mask = mask | _seen_before(_duplicate_keys(df), history)
+    return mask
+
+def _weekend_mask(dates):
+    """
+    True for Saturday and Sunday in a datetime64 array; NaT is never flagged.
+    """
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    # 1970-01-01 was a Thursday, weekday 3 with Monday as 0
+    return ((days + 3) % 7 >= 5) & ~np.isnat(dates)
+
+def detect_unusual_timing_mask(df):
+    """
+    Boolean mask of weekend transactions. Dates are only parsed here when df has not
+    been through prepare_transactions; unparseable dates are not flagged.
+    """
+    return _weekend_mask(parse_dates(df['date']))  # Sat/Sun
+
+def detect_round_number_abuse_mask(df):
+    """
+    Boolean mask of amounts that are a multiple of 1,000.
+    """
+    return (df['amount'] % 1000 == 0).to_numpy()
+
+def _limit_rules(limits, threshold):
+    """
+    Limit table as one row per tier with 'approved_by', 'account', 'limit' and a 'rule'
+    number shared by the tiers of each (approved_by, account) pair, sorted by rule and
+    limit. A missing approved_by or account matches anyone; when no rule matches
+    everyone, a single tier at threshold does.
+    """
+    table = pd.DataFrame(limits if limits is not None else [], columns=["approved_by", "account", "limit"])
+    table = table.astype({"approved_by": object, "account": object, "limit": np.float64})
+    for column in ("approved_by", "account"):
+        table[column] = [None if pd.isna(value) else _limit_key(value) for value in table[column]]
+    if not (table['approved_by'].isna() & table['account'].isna()).any():
+        default = pd.DataFrame({"approved_by": [None], "account": [None], "limit": [float(threshold)]}, dtype=object)
+        table = pd.concat([table, default.astype({"limit": np.float64})], ignore_index=True)
+    table['rule'] = table.groupby(['approved_by', 'account'], dropna=False, sort=False).ngroup()
+    return table.sort_values(['rule', 'limit'], ignore_index=True)
+
+def _limit_key(value):
+    # Approvers and accounts are matched as text, so an account 6100 in the JSON config
+    # matches the '6100' a CSV is read as, and 6100.0 from a column with gaps matches both
+    if isinstance(value, (float, np.floating)) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def _value_codes(values):
+    # Codes into a small Index of the distinct values as _limit_key text (-1 for missing),
+    # categorical or not
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+        codes = codes.astype(np.int64)
+    # Values that differ only in type, like 6100 and '6100', share one code
+    text_codes, text = pd.factorize(pd.Index([_limit_key(value) for value in uniques], dtype=object))
+    return np.append(text_codes, -1)[codes], pd.Index(np.asarray(text, dtype=object))
+
+def _row_rules(df, table):
+    """
+    Rule number for every row: the most specific rule matching its approver and account.
+    Rules are resolved once per distinct (approver, account) pair and spread to the rows
+    with one gather, so the cost per row does not grow with the number of rules.
+    """
+    rules = table.drop_duplicates('rule')
+    codes, values = {}, {}
+    for column in ('approved_by', 'account'):
+        if column in df.columns:
+            codes[column], values[column] = _value_codes(df[column])
+        else:
+            codes[column], values[column] = np.full(len(df), -1, dtype=np.int64), pd.Index([], dtype=object)
+    # Each row's pair as one integer, with 0 standing for a missing value
+    width = len(values['account']) + 1
+    row_key = (codes['approved_by'] + 1) * width + codes['account'] + 1
+    if (len(values['approved_by']) + 1) * width <= 4 * len(df):
+        pair_of_row, pairs = row_key, np.arange((len(values['approved_by']) + 1) * width)
+    else:
+        pair_of_row, pairs = pd.factorize(row_key)
+    approver_of_pair, account_of_pair = pairs // width, pairs % width
+
+    def positions(column, selected):
+        # 1-based position of each selected rule's value, 0 when no row has it
+        return values[column].get_indexer(rules.loc[selected, column].astype(object)) + 1
+
+    has_approver, has_account = rules['approved_by'].notna(), rules['account'].notna()
+    pair_rules = np.full(len(pairs), rules.loc[~has_approver & ~has_account, 'rule'].iloc[0], dtype=np.int64)
+    # Least specific first, so more specific rules overwrite
+    for column, of_pair, selected in (('account', account_of_pair, ~has_approver & has_account),
+                                      ('approved_by', approver_of_pair, has_approver & ~has_account)):
+        by_value = np.full(len(values[column]) + 1, -1, dtype=np.int64)
+        by_value[positions(column, selected)] = rules.loc[selected, 'rule'].to_numpy()
+        by_value[0] = -1
+        pair_rules = np.where(by_value[of_pair] >= 0, by_value[of_pair], pair_rules)
+    selected = has_approver & has_account
+    keys = positions('approved_by', selected) * width + positions('account', selected)
+    known = (keys // width > 0) & (keys % width > 0)
+    found = pd.Index(pairs).get_indexer(keys[known])
+    pair_rules[found[found >= 0]] = rules.loc[selected, 'rule'].to_numpy()[known][found >= 0]
+    return pair_rules[pair_of_row]
+
+def _threshold_tiers(df, threshold=THRESHOLD_AMOUNT, limits=THRESHOLD_LIMITS):
+    """
+    The approval limit each payment sits within 10% below, NaN where there is none.
+    Every rule's tiers are laid end to end on one sorted axis (rule * span + limit), so
+    a single np.searchsorted finds the next limit above each amount under its own rule.
+    """
+    table = _limit_rules(limits, threshold)
+    amounts = df['amount'].to_numpy(dtype=np.float64, na_value=np.nan)
+    rules = _row_rules(df, table)
+    bound_rules, bound_limits = table['rule'].to_numpy(), table['limit'].to_numpy()
+    # Amounts at or above the highest limit cannot avoid any tier, so they are clipped
+    # to stay inside their own rule's stretch of the axis
+    span = 2 * max(bound_limits.max(), 1)
+    bounds = bound_rules * span + bound_limits
+    position = np.searchsorted(bounds, rules * span + np.minimum(amounts, span / 2), side='right')
+    position = np.minimum(position, len(bounds) - 1)
+    tiers = bound_limits[position]
+    with np.errstate(invalid='ignore'):
+        flagged = (bound_rules[position] == rules) & (amounts >= 0.9 * tiers) & (amounts < tiers)
+    return np.where(flagged, tiers, np.nan)
+
+def detect_threshold_avoidance_mask(df, threshold=THRESHOLD_AMOUNT, split_window_days=SPLIT_WINDOW_DAYS,
+                                    limits=THRESHOLD_LIMITS):
+    """
+    Boolean mask of amounts within 10% below the approval threshold and, with
+    split_window_days set, of the parts of split transactions (see
+    detect_split_transactions_mask).
+    limits is a table of tiered approval limits, as a DataFrame or a list of records
+    with 'approved_by', 'account' and 'limit', one per tier, e.g.
+    [{"approved_by": "J. Smith", "limit": 5000}, {"account": "6100", "limit": 50000}].
+    A payment is checked against every tier of the most specific rule for its approver
+    and account, and against threshold when no rule covers it. Approvers and accounts
+    are compared as text, so 6100 and "6100" are the same account.
+    """
+    return _threshold_avoidance(df, threshold, split_window_days, limits)[0]
+
+def _threshold_avoidance(df, threshold, split_window_days, limits):
+    # The mask and, with a limit table, the tier of each row (NaN where none is avoided)
+    if limits is None:
+        mask, tiers = ((df['amount'] >= threshold * 0.9) & (df['amount'] < threshold)).to_numpy(), None
+    else:
+        tiers = _threshold_tiers(df, threshold, limits)
+        mask = ~np.isnan(tiers)
+    if split_window_days is not None:
+        mask = mask | _split_transaction_mask(df, threshold, split_window_days)
+    return mask, tiers
+
+def detect_split_transactions_mask(df, threshold=THRESHOLD_AMOUNT, window_days=7, by=SPLIT_GROUPS):
+    """
+    Boolean mask of payments below the threshold that, together with other such payments
+    to the same vendor (or approved by the same person, for each column in `by`) within
+    window_days, add up to the threshold or more: a large invoice split to stay under
+    the approval limit.
+    """
+    return _split_transaction_mask(df, threshold, window_days, by)
+
+def detect_duplicate_payments(df, history=DUPLICATE_HISTORY_PATH, window_days=DUPLICATE_WINDOW_DAYS,
+                              amount_tolerance=DUPLICATE_AMOUNT_TOLERANCE):
+    duplicates = df[detect_duplicate_payments_mask(df, history, window_days, amount_tolerance)]
     print(f"Duplicate payments flagged: {len(duplicates)}")
     logging.info(f"Duplicate payments flagged: {len(duplicates)}")
     return duplicates
 
 def detect_unusual_timing(df):
-    # Ensure date is datetime
-    df['date'] = pd.to_datetime(df['date'])
-    unusual = df[df['date'].dt.weekday >= 5]  # Sat/Sun
+    unusual = df[detect_unusual_timing_mask(df)]
     print(f"Unusual timing flagged: {len(unusual)}")
     logging.info(f"Unusual timing flagged: {len(unusual)}")
     return unusual
 
 def detect_round_number_abuse(df):
-    round_numbers = df[df['amount'] % 1000 == 0]
+    round_numbers = df[detect_round_number_abuse_mask(df)]
     print(f"Round-number abuse flagged: {len(round_numbers)}")
     logging.info(f"Round-number abuse flagged: {len(round_numbers)}")
     return round_numbers
 
-def detect_threshold_avoidance(df, threshold=THRESHOLD_AMOUNT):
-    flagged = df[(df['amount'] >= threshold * 0.9) & (df['amount'] < threshold)]
+def detect_threshold_avoidance(df, threshold=THRESHOLD_AMOUNT, split_window_days=SPLIT_WINDOW_DAYS,
+                               limits=THRESHOLD_LIMITS):
+    mask, tiers = _threshold_avoidance(df, threshold, split_window_days, limits)
+    flagged = df[mask]
+    if tiers is not None:
+        # The limit each flagged payment stays under; NaN for split parts not near a tier themselves
+        flagged = flagged.assign(tier=tiers[mask])
     print(f"Threshold avoidance flagged: {len(flagged)}")
     logging.info(f"Threshold avoidance flagged: {len(flagged)}")
     return flagged
 
+def detect_split_transactions(df, threshold=THRESHOLD_AMOUNT, window_days=7, by=SPLIT_GROUPS):
+    flagged = df[detect_split_transactions_mask(df, threshold, window_days, by)]
+    print(f"Split transactions flagged: {len(flagged)}")
+    logging.info(f"Split transactions flagged: {len(flagged)}")
+    return flagged
+
 # ----------------------------
 # Fraud Hunter Functions
 # ----------------------------
+# Row e - _MIN_DECIMAL_EXPONENT holds the floats nearest 10, 11, ..., 100 times 10**(e - 1), so
+# an amount whose first two significant digits are d and exponent e compares >= column d - 10
+# and < column d - 9
+_MIN_DECIMAL_EXPONENT = -330
+_DIGIT_BOUNDS = np.array([[float(f"{d}e{e - 1}") for d in range(10, 101)] for e in range(_MIN_DECIMAL_EXPONENT, 310)])
+
+# Nigrini's MAD upper bounds for close, acceptable and marginally acceptable conformity
+_MAD_CONFORMITY = {
+    "first_digit": (0.006, 0.012, 0.015),
+    "second_digit": (0.008, 0.010, 0.012),
+    "first_two_digits": (0.0012, 0.0018, 0.0022),
+}
+_CONFORMITY_LEVELS = np.array(["Close conformity", "Acceptable conformity", "Marginally acceptable conformity", "Nonconformity"])
+
+def _benford_amounts(amounts):
+    """
+    Absolute values of the non-zero finite amounts, the only ones that have significant digits.
+    """
+    values = np.abs(np.asarray(amounts, dtype=np.float64))
+    return values[np.isfinite(values) & (values > 0)]
+
+def _first_two_digits(values):
+    """
+    First two significant digits (10-99) of every positive finite value, by log10/floor
+    arithmetic over the whole array.
+    """
+    row = np.floor(np.log10(values)).astype(np.int64) - _MIN_DECIMAL_EXPONENT
+    row = np.clip(row, 1, len(_DIGIT_BOUNDS) - 2)
+    # log10 rounding can put amounts next to a power of ten in the wrong decade
+    row -= values < _DIGIT_BOUNDS[row, 0]
+    row += values >= _DIGIT_BOUNDS[row, 90]
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        column = np.clip(np.floor(values / _DIGIT_BOUNDS[row, 0] * 10) - 10, 0, 89).astype(np.int64)
+    column -= values < _DIGIT_BOUNDS[row, column]
+    column += values >= _DIGIT_BOUNDS[row, column + 1]
+    return np.clip(column, 0, 89) + 10
+
+def _leading_digits(amounts):
+    """
+    First significant digit (1-9) of every non-zero finite amount. Zero, NaN and
+    infinite amounts are skipped.
+    """
+    return (_first_two_digits(_benford_amounts(amounts)) // 10).astype(np.int8)
+
+def _benford_frame(counts, expected, digits):
+    """
+    Actual and expected digit frequencies indexed by digit, as returned by analyze_benford.
+    """
+    return pd.DataFrame({
+        'Actual': pd.Series(counts / counts.sum(), index=digits),
+        'Expected': pd.Series(expected, index=digits)
+    })
+
+def _benford_statistics(test, counts, expected):
+    """
+    Chi-square, Kolmogorov-Smirnov and mean absolute deviation of observed digit counts
+    against the expected proportions, with Nigrini's MAD conformity level where one exists.
+    """
+    total = counts.sum()
+    actual = counts / total
+    mad = float(np.abs(actual - expected).mean())
+    conformity = None
+    if test in _MAD_CONFORMITY:
+        conformity = str(_CONFORMITY_LEVELS[np.searchsorted(_MAD_CONFORMITY[test], mad)])
+    return {
+        "count": int(total),
+        "chi_square": float((total * (actual - expected) ** 2 / expected).sum()),
+        "degrees_of_freedom": len(counts) - 1,
+        "ks": float(np.abs(np.cumsum(actual) - np.cumsum(expected)).max()),
+        # 5% critical value of the KS statistic for large samples
+        "ks_critical": float(1.36 / np.sqrt(total)),
+        "mad": mad,
+        "conformity": conformity
+    }
+
+class BenfordAccumulator:
+    """
+    Fixed-size digit counts for the Benford tests, filled chunk by chunk with update()
+    and combined across workers with merge(), so any number of amounts fits in a few
+    hundred integers. analysis() and tests() give the same results as analyze_benford
+    and analyze_benford_tests over all the amounts seen.
+    """
+
+    def __init__(self):
+        # Indexed by first-two digits (10-99) of every non-zero amount and of amounts >= 10,
+        # and by last-two digits (0-99) of amounts >= 10
+        self.first_two = np.zeros(100, dtype=np.int64)
+        self.first_two_large = np.zeros(100, dtype=np.int64)
+        self.last_two = np.zeros(100, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.first_two.sum())
+
+    def update(self, amounts):
+        """
+        Count the digits of a chunk of amounts. NaN, zero and infinite amounts are skipped.
+        """
+        values = _benford_amounts(amounts)
+        first_two = _first_two_digits(values)
+        large = values >= 10
+        self.first_two += np.bincount(first_two, minlength=100)
+        self.first_two_large += np.bincount(first_two[large], minlength=100)
+        self.last_two += np.bincount((np.floor(values[large]) % 100).astype(np.int64), minlength=100)
+        return self
+
+    def merge(self, other):
+        """
+        Add the counts of another accumulator, e.g. one filled by a different worker or shard.
+        """
+        self.first_two += other.first_two
+        self.first_two_large += other.first_two_large
+        self.last_two += other.last_two
+        return self
+
+    def _test_counts(self):
+        first_two_ref = np.log10(1 + 1 / np.arange(10, 100))
+        return {
+            "first_digit": (
+                self.first_two[10:].reshape(9, 10).sum(axis=1),
+                np.log10(1 + 1 / np.arange(1, 10)),
+                range(1, 10)
+            ),
+            "second_digit": (
+                self.first_two_large[10:].reshape(9, 10).sum(axis=0),
+                first_two_ref.reshape(9, 10).sum(axis=0),
+                range(10)
+            ),
+            "first_two_digits": (self.first_two_large[10:], first_two_ref, range(10, 100)),
+            "last_two_digits": (self.last_two, np.full(100, 0.01), range(100)),
+        }
+
+    def analysis(self):
+        """
+        Actual and expected first digit frequencies, or an empty frame before any amount.
+        """
+        if len(self) == 0:
+            return pd.DataFrame()
+        return _benford_frame(*self._test_counts()["first_digit"])
+
+    def tests(self):
+        """
+        {test: {"analysis": Actual/Expected frame, "statistics": {...}}} for the first digit,
+        second digit, first-two digits and last-two digits tests that have any amount.
+        """
+        results = {}
+        for test, (counts, expected, digits) in self._test_counts().items():
+            if counts.sum() == 0:
+                continue
+            results[test] = {
+                "analysis": _benford_frame(counts, expected, digits),
+                "statistics": _benford_statistics(test, counts, expected)
+            }
+        return results
+
 def analyze_benford(df):
     """
     Perform Benford's Law analysis on the leading digits of transaction amounts.
     """
-    # Extract leading digits (1-9)
-    amounts = df['amount'].dropna()
-    leading_digits = amounts.apply(lambda x: int(str(abs(x))[0]) if abs(x) >= 1 else None).dropna()
-    
-    if leading_digits.empty:
-        return pd.DataFrame()
-    
-    counts = leading_digits.value_counts(normalize=True).sort_index()
-    
-    # Standard Benford distribution
-    benford_ref = pd.Series({d: np.log10(1 + 1/d) for d in range(1, 10)})
-    
-    analysis = pd.DataFrame({
-        'Actual': counts,
-        'Expected': benford_ref
-    }).fillna(0)
+    analysis = BenfordAccumulator().update(df['amount'].dropna().to_numpy()).analysis()
     
     logging.info("Performed Benford's Law analysis")
     return analysis
 
-def detect_fuzzy_duplicates(df, threshold=90):
+def analyze_benford_tests(df):
+    """
+    First digit, second digit, first-two digits and last-two digits Benford tests with
+    their conformity statistics, from one pass over the amount column.
+    Follows Nigrini in running every test except the first digit on amounts >= 10 only.
+    Returns {test: {"analysis": Actual/Expected frame, "statistics": {...}}}; tests
+    without any qualifying amount are left out.
+    """
+    accumulator = BenfordAccumulator().update(df['amount'].dropna().to_numpy())
+    results = accumulator.tests()
+
+    logging.info(f"Performed Benford's Law tests on {len(accumulator)} amounts")
+    return results
+
+def analyze_benford_groups(df, by="vendor", top_n=BENFORD_TOP_GROUPS, min_count=BENFORD_MIN_GROUP_SIZE):
+    """
+    First digit Benford conformity of every group of transactions (e.g. per vendor or account).
+    Builds a groups x 9 digit-count matrix with one np.bincount and scores all groups at once.
+    Returns the top_n groups with at least min_count amounts, most deviant (highest MAD) first.
+    """
+    columns = [by, "Count", "MAD", "Chi-Square", "Conformity"]
+    if by not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    values = np.abs(df['amount'].to_numpy(dtype=np.float64, na_value=np.nan))
+    codes, groups = pd.factorize(df[by])
+    valid = np.isfinite(values) & (values > 0) & (codes >= 0)
+    digits = _first_two_digits(values[valid]) // 10
+    codes = codes[valid]
+
+    counts = np.bincount(codes * 9 + (digits - 1), minlength=len(groups) * 9).reshape(len(groups), 9)
+    totals = counts.sum(axis=1)
+    keep = np.flatnonzero(totals >= max(min_count, 1))
+    counts, totals = counts[keep], totals[keep]
+
+    expected = np.log10(1 + 1 / np.arange(1, 10))
+    actual = counts / totals[:, None]
+    mad = np.abs(actual - expected).mean(axis=1)
+    chi_square = (totals[:, None] * (actual - expected) ** 2 / expected).sum(axis=1)
+
+    top = np.argsort(-mad, kind="stable")[:top_n]
+    result = pd.DataFrame({
+        by: groups[keep[top]],
+        "Count": totals[top],
+        "MAD": mad[top],
+        "Chi-Square": chi_square[top],
+        "Conformity": _CONFORMITY_LEVELS[np.searchsorted(_MAD_CONFORMITY["first_digit"], mad[top])]
+    }, columns=columns)
+
+    logging.info(f"Benford analysis by {by}: {len(keep)} of {len(groups)} groups with at least {min_count} amounts")
+    return result
+
+def _max_indel_distance(len1, len2, threshold):
+    """
+    Largest Indel distance at which fuzz.ratio can still round up to the threshold.
+    """
+    total = len1 + len2
+    return int(total * (100.5 - threshold) / 100 + 1e-9)
+
+def _ratio_upper_bound(len1, len2):
+    """
+    Best fuzz.ratio two names of these lengths could score (2 * min / (len1 + len2)).
+    """
+    total = len1 + len2
+    return 100 if total == 0 else int(round(200 * min(len1, len2) / total))
+
+def _length_order(names, threshold):
+    """
+    Indices of names sorted by length, and for each sorted position the end of
+    the run of names whose lengths can still reach the threshold with it.
+
+    Visiting names shortest first, the inner loop for each one can stop at that
+    end: past it 2 * min / (len1 + len2) is already below the threshold.
+    """
+    order = sorted(range(len(names)), key=lambda k: len(names[k]))
+    lengths = [len(names[k]) for k in order]
+    stop = {}
+    stops = []
+    for length in lengths:
+        if length not in stop:
+            longest = length
+            while longest < lengths[-1] and _ratio_upper_bound(length, longest + 1) >= threshold:
+                longest += 1
+            stop[length] = bisect.bisect_right(lengths, longest)
+        stops.append(stop[length])
+    return order, stops
+
+def _ngram_tokens(name, n):
+    """
+    Character n-grams of a name, with repeats numbered so the multiset acts as a set.
+    """
+    seen = {}
+    tokens = []
+    for k in range(len(name) - n + 1):
+        gram = name[k:k + n]
+        occurrence = seen.get(gram, 0)
+        seen[gram] = occurrence + 1
+        tokens.append((gram, occurrence))
+    return tokens
+
+def _min_shared_ngrams(len1, len2, threshold, n):
+    """
+    Lower bound on n-grams two names must share to reach the threshold.
+
+    Turning one name into the other takes (d + |l1 - l2|) / 2 deletions and
+    (d - |l1 - l2|) / 2 insertions for Indel distance d; each deletion breaks at
+    most n of the longer name's n-grams and each insertion at most n - 1.
+    """
+    longer, shorter = max(len1, len2), min(len1, len2)
+    gap = longer - shorter
+    distance = _max_indel_distance(len1, len2, threshold)
+    distance -= (distance - gap) % 2
+    deletions, insertions = (distance + gap) // 2, (distance - gap) // 2
+    return longer - n + 1 - n * deletions - (n - 1) * insertions
+
+def _blocked_candidate_pairs(names, threshold, n):
+    """
+    Yield (i, partners) for index pairs, partners before i, whose n-gram prefix
+    blocks overlap.
+
+    Each name is blocked on its rarest n-grams only (prefix filtering), so a pair
+    that shares enough n-grams to reach the threshold always shares a block.
+    Names too short to be bounded this way are paired with every name of a
+    compatible length.
+    """
+    tokens = [_ngram_tokens(name, n) for name in names]
+    frequency = {}
+    for name_tokens in tokens:
+        for token in name_tokens:
+            frequency[token] = frequency.get(token, 0) + 1
+
+    lengths = sorted({len(name) for name in names})
+    required = {}
+    for length in lengths:
+        required[length] = [
+            (other, _min_shared_ngrams(length, other, threshold, n))
+            for other in lengths
+            if _ratio_upper_bound(length, other) >= threshold
+        ]
+
+    blocks = {}
+    by_length = {}
+    for i, name in enumerate(names):
+        length = len(name)
+        ordered = sorted(tokens[i], key=lambda token: (frequency[token], token))
+        candidates = set()
+        for other, shared in required[length]:
+            if shared <= 0:
+                candidates.update(by_length.get(other, ()))
+                continue
+            for token in ordered[:len(ordered) - shared + 1]:
+                candidates.update(blocks.get((token, other), ()))
+        yield i, candidates
+
+        # Index under the longest prefix any partner length needs
+        shared = min((shared for _, shared in required[length] if shared > 0), default=None)
+        if shared is not None:
+            for token in ordered[:len(ordered) - shared + 1]:
+                blocks.setdefault((token, length), []).append(i)
+        by_length.setdefault(length, []).append(i)
+
+def _mix64(values):
+    """
+    splitmix64 finalizer: spread uint64 values over all 64 bits.
+    """
+    with np.errstate(over='ignore'):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+def _minhash_band_keys(names, n, bands, rows, seed=0):
+    """
+    Yield, per LSH band, one uint64 key per name hashing `rows` MinHash values
+    of the name's padded character n-grams. Bands are computed one at a time
+    so memory stays proportional to the number of n-grams.
+    """
+    padding = "\0" * (n - 1)
+    padded = [padding + name + padding for name in names]
+    codes = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    counts = np.maximum(lengths - n + 1, 0)
+
+    owner = np.repeat(np.arange(len(names)), counts)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    positions = offsets[owner] + np.arange(len(owner)) - first[owner]
+    shingles = np.zeros(len(owner), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for m in range(n):
+            shingles = shingles * np.uint64(0x100000001B3) + codes[positions + m]
+    shingles = _mix64(shingles)
+    del codes, owner, positions
+
+    salts = np.random.default_rng(seed).integers(0, 2**63, size=(bands, rows), dtype=np.uint64)
+    has_shingles = counts > 0
+    starts = first[has_shingles]
+    for band in range(bands):
+        keys = np.zeros(len(names), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for salt in salts[band]:
+                minimum = np.full(len(names), np.iinfo(np.uint64).max, dtype=np.uint64)
+                minimum[has_shingles] = np.minimum.reduceat(_mix64(shingles ^ salt), starts)
+                keys = _mix64(keys * np.uint64(0x100000001B3) + minimum)
+        yield keys
+
+def _minhash_candidate_pairs(names, n, bands, rows, seed=0):
+    """
+    Yield (i, partners) for names whose MinHash signatures collide in at
+    least one LSH band of `rows` values. Pairs with n-gram Jaccard similarity
+    J are found with probability 1 - (1 - J**rows)**bands.
+    """
+    if len(names) < 2:
+        return
+    pair_codes = []
+    for keys in _minhash_band_keys(names, n, bands, rows, seed):
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        bucket_start = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        bucket_end = np.append(bucket_start[1:], len(order))
+        # Each member pairs with the members after it in its bucket
+        position = np.arange(len(order))
+        end = np.repeat(bucket_end, bucket_end - bucket_start)
+        partners = end - position - 1
+        total = int(partners.sum())
+        if total == 0:
+            continue
+        left = np.repeat(position, partners)
+        right = left + 1 + np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+        i, j = order[left], order[right]
+        pair_codes.append(np.minimum(i, j).astype(np.int64) * len(names) + np.maximum(i, j))
+
+    if not pair_codes:
+        return
+    pair_codes = np.unique(np.concatenate(pair_codes))
+    first, second = np.divmod(pair_codes, len(names))
+    cuts = np.flatnonzero(np.diff(first)) + 1
+    for i, partners in zip(first[np.concatenate(([0], cuts))], np.split(second, cuts)):
+        yield int(i), partners
+
+def _score_pairs(names, pairs, threshold):
+    """
+    Score (i, partners) rows one pair at a time with thefuzz.
+    """
+    matched = []
+    for i, partners in pairs:
+        name = names[i]
+        for j in partners:
+            score = fuzz.ratio(name, names[j])
+            if score >= threshold:
+                matched.append((min(i, j), max(i, j), score))
+    return matched
+
+def _rapidfuzz_matches(scores, threshold):
+    """
+    Round rapidfuzz scores the way thefuzz does (half to even) and test the threshold.
+    """
+    rounded = np.round(scores)
+    return rounded, rounded >= threshold
+
+def _score_pairs_rapidfuzz(names, pairs, threshold, workers, chunk_size):
+    """
+    Score (i, partners) rows with rapidfuzz, batching about chunk_size * 1024
+    pairs into each native cpdist call.
+    """
+    name_array = np.array(names, dtype=object)
+    matched = []
+    lefts, rights, pending = [], [], 0
+
+    def flush():
+        left, right = np.concatenate(lefts), np.concatenate(rights)
+        scores = rf_process.cpdist(name_array[left], name_array[right],
+                                   scorer=rf_fuzz.ratio, score_cutoff=max(threshold - 0.5, 0),
+                                   dtype=np.float32, workers=workers)
+        rounded, hits = _rapidfuzz_matches(scores, threshold)
+        for k in np.flatnonzero(hits):
+            i, j = int(left[k]), int(right[k])
+            matched.append((min(i, j), max(i, j), int(rounded[k])))
+        lefts.clear()
+        rights.clear()
+
+    for i, partners in pairs:
+        if not isinstance(partners, np.ndarray):
+            partners = np.fromiter(partners, dtype=np.int64, count=len(partners))
+        if len(partners) == 0:
+            continue
+        lefts.append(np.full(len(partners), i, dtype=np.int64))
+        rights.append(partners)
+        pending += len(partners)
+        if pending >= chunk_size * 1024:
+            flush()
+            pending = 0
+    if lefts:
+        flush()
+    return matched
+
+def _score_length_sorted(names, order, stops, start, end, threshold, backend, workers, chunk_size):
+    """
+    Score length-sorted positions [start, end) against the later names their
+    lengths can still match. rapidfuzz scores chunk_size rows per cdist call.
+    """
+    if backend != "rapidfuzz":
+        return _score_pairs(names, ((order[a], order[a + 1:stops[a]]) for a in range(start, end)), threshold)
+
+    sorted_names = [names[k] for k in order]
+    order = np.asarray(order, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+    matched = []
+    for first in range(start, end, chunk_size):
+        last = min(first + chunk_size, end)
+        col_end = stops[last - 1]
+        if col_end <= first + 1:
+            continue
+        scores = rf_process.cdist(sorted_names[first:last], sorted_names[first + 1:col_end],
+                                  scorer=rf_fuzz.ratio, score_cutoff=max(threshold - 0.5, 0),
+                                  dtype=np.float32, workers=workers)
+        rows = np.arange(first, last)[:, None]
+        cols = np.arange(first + 1, col_end)[None, :]
+        rounded, hits = _rapidfuzz_matches(scores, threshold)
+        hits &= (cols > rows) & (cols < stops[first:last, None])
+        for r, c in zip(*np.nonzero(hits)):
+            i, j = order[first + r], order[first + 1 + c]
+            matched.append((int(min(i, j)), int(max(i, j)), int(rounded[r, c])))
+    return matched
+
+def _balanced_tiles(work, count):
+    """
+    Split rows into at most `count` contiguous (start, end) tiles of roughly
+    equal total work.
+    """
+    cumulative = np.cumsum(work)
+    if len(cumulative) == 0 or cumulative[-1] == 0:
+        return [(0, len(work))] if len(work) else []
+    cuts = np.searchsorted(cumulative, cumulative[-1] * np.arange(1, count) / count, side='right')
+    bounds = np.unique(np.concatenate(([0], cuts, [len(work)])))
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+_fuzzy_shared = {}
+
+def _init_fuzzy_worker(shared):
+    """
+    Keep the read-only vendor arrays in each pool process so tiles only carry bounds.
+    """
+    _fuzzy_shared.update(shared)
+
+def _score_fuzzy_tile(tile):
+    """
+    Score one tile in a pool process: a range of length-sorted rows, or a list
+    of blocked (i, partners) rows.
+    """
+    shared = _fuzzy_shared
+    if shared['rows'] is None:
+        start, end = tile
+        return _score_length_sorted(shared['names'], shared['order'], shared['stops'], start, end,
+                                    shared['threshold'], shared['backend'], 1, shared['chunk_size'])
+    rows = shared['rows'][tile[0]:tile[1]]
+    if shared['backend'] == "rapidfuzz":
+        return _score_pairs_rapidfuzz(shared['names'], rows, shared['threshold'], 1, shared['chunk_size'])
+    return _score_pairs(shared['names'], rows, shared['threshold'])
+
+def _score_sharded(names, rows, threshold, backend, chunk_size, processes):
+    """
+    Score the pair space across a process pool. Rows (length-sorted positions,
+    or blocked candidate rows) are cut into tiles of equal pair counts, a few
+    per process, and the merged matches are sorted so the result does not
+    depend on scheduling.
+    """
+    if rows is None:
+        order, stops = _length_order(names, threshold)
+        work = [stop - a - 1 for a, stop in enumerate(stops)]
+    else:
+        order = stops = None
+        rows = [(i, list(partners)) for i, partners in rows]
+        work = [len(partners) for _, partners in rows]
+
+    shared = {'names': names, 'order': order, 'stops': stops, 'rows': rows,
+              'threshold': threshold, 'backend': backend, 'chunk_size': chunk_size}
+    tiles = _balanced_tiles(work, processes * 4)
+    matched = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_fuzzy_worker, initargs=(shared,)) as pool:
+        for tile_matches in pool.map(_score_fuzzy_tile, tiles):
+            matched.extend(tile_matches)
+    return matched
+
+def _score_against(names, others, threshold, backend, workers):
+    """
+    Score each name against every length-compatible name in `others`, returning
+    (name index, other index, score) for pairs at or above the threshold.
+    """
+    order = sorted(range(len(others)), key=lambda k: len(others[k]))
+    lengths = [len(others[k]) for k in order]
+    sorted_others = [others[k] for k in order]
+    distinct = sorted(set(lengths))
+    matched = []
+    for i, name in enumerate(names):
+        # Compatible lengths form one contiguous run around the name's own length
+        compatible = [other for other in distinct if _ratio_upper_bound(len(name), other) >= threshold]
+        if not compatible:
+            continue
+        candidates = range(bisect.bisect_left(lengths, compatible[0]), bisect.bisect_right(lengths, compatible[-1]))
+        if backend == "rapidfuzz":
+            scores = rf_process.cdist([name], [sorted_others[a] for a in candidates],
+                                      scorer=rf_fuzz.ratio, score_cutoff=max(threshold - 0.5, 0),
+                                      dtype=np.float32, workers=workers)[0]
+            rounded, hits = _rapidfuzz_matches(scores, threshold)
+            matched.extend((i, order[candidates[c]], int(rounded[c])) for c in np.flatnonzero(hits))
+        else:
+            for a in candidates:
+                score = fuzz.ratio(name, sorted_others[a])
+                if score >= threshold:
+                    matched.append((i, order[a], score))
+    return matched
+
+class VendorSimilarityCache:
+    """
+    SQLite store of fuzzy matching results kept between runs.
+
+    Every pair of names in the vendors table has been scored at the cache
+    threshold, and the pairs that reached it are stored in matches keyed on
+    the ordered name pair. A run therefore only scores pairs involving names
+    the cache has not seen. Least recently used names are evicted once the
+    cache holds more than max_vendors.
+    """
+
+    def __init__(self, path=FUZZY_CACHE_PATH, max_vendors=FUZZY_CACHE_MAX_VENDORS):
+        self.path = path
+        self.max_vendors = max_vendors
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS vendors (name TEXT PRIMARY KEY, last_used INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS matches (
+                vendor1 TEXT NOT NULL, vendor2 TEXT NOT NULL, score INTEGER NOT NULL,
+                PRIMARY KEY (vendor1, vendor2)
+            );
+            CREATE INDEX IF NOT EXISTS matches_vendor2 ON matches (vendor2);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def _setting(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def threshold(self):
+        value = self._setting("threshold")
+        return None if value is None else int(value)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM vendors").fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM vendors")
+            self.connection.execute("DELETE FROM matches")
+            self.connection.execute("DELETE FROM settings")
+
+    def prepare(self, threshold):
+        """
+        Make the cache able to answer at this threshold; stored matches only
+        cover scores at or above the threshold they were computed at.
+        """
+        if self.threshold is None or threshold < self.threshold:
+            self.clear()
+            with self.connection:
+                self._set("threshold", threshold)
+
+    def names(self):
+        return [row[0] for row in self.connection.execute("SELECT name FROM vendors")]
+
+    def _load_current(self, names):
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_vendors (name TEXT PRIMARY KEY)")
+        self.connection.execute("DELETE FROM current_vendors")
+        self.connection.executemany("INSERT OR IGNORE INTO current_vendors (name) VALUES (?)", ((n,) for n in names))
+
+    def known(self, names):
+        """
+        The subset of names already scored against everything in the cache.
+        """
+        self._load_current(names)
+        return {row[0] for row in self.connection.execute(
+            "SELECT v.name FROM vendors v JOIN current_vendors c ON c.name = v.name")}
+
+    def matches(self, names, threshold):
+        """
+        Stored (name1, name2, score) matches between the given names.
+        """
+        self._load_current(names)
+        return self.connection.execute("""
+            SELECT m.vendor1, m.vendor2, m.score FROM matches m
+            JOIN current_vendors a ON a.name = m.vendor1
+            JOIN current_vendors b ON b.name = m.vendor2
+            WHERE m.score >= ?
+        """, (threshold,)).fetchall()
+
+    def add(self, new_names, new_matches, used_names):
+        """
+        Record newly scored names and their matches, and mark used_names as
+        recently used.
+        """
+        run = int(self._setting("run", 0)) + 1
+        with self.connection:
+            self._set("run", run)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO matches (vendor1, vendor2, score) VALUES (?, ?, ?)",
+                ((min(a, b), max(a, b), score) for a, b, score in new_matches))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO vendors (name, last_used) VALUES (?, ?)",
+                ((name, run) for name in set(new_names) | set(used_names)))
+
+    def evict(self):
+        """
+        Drop the least recently used names, and their matches, over max_vendors.
+        """
+        excess = len(self) - self.max_vendors
+        if excess <= 0:
+            return
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS evicted (name TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM evicted")
+            self.connection.execute(
+                "INSERT INTO evicted SELECT name FROM vendors ORDER BY last_used, name LIMIT ?", (excess,))
+            self.connection.execute("DELETE FROM vendors WHERE name IN (SELECT name FROM evicted)")
+            self.connection.execute(
+                "DELETE FROM matches WHERE vendor1 IN (SELECT name FROM evicted) "
+                "OR vendor2 IN (SELECT name FROM evicted)")
+        logging.info(f"Vendor similarity cache evicted {excess} vendor names")
+
+class VendorIndex:
+    """
+    Long-lived registry of vendor names for checking one name at a time.
+
+    Names are indexed on all their n-grams, bucketed by name length. A query
+    probes only its rarest n-grams: a name that must share t n-grams with the
+    query to reach the threshold shares at least one of any len - t + 1 of
+    them, so candidates come from short posting lists and are then scored
+    with the same backend choices as detect_fuzzy_duplicates.
+    """
+
+    def __init__(self, names=(), ngram_size=FUZZY_NGRAM_SIZE, backend=FUZZY_BACKEND):
+        if backend not in ("thefuzz", "rapidfuzz"):
+            raise ValueError(f"Unknown fuzzy matching backend: {backend}")
+        if backend == "rapidfuzz" and rf_process is None:
+            raise ImportError("The rapidfuzz backend requires the rapidfuzz package")
+        self.ngram_size = ngram_size
+        self.backend = backend
+        self.names = []
+        self.ids = {}
+        self.frequency = {}
+        self.postings = {}
+        self.by_length = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return str(name) in self.ids
+
+    def add(self, name):
+        """
+        Register a vendor name and return its id; known names keep their id.
+        """
+        name = str(name)
+        if name in self.ids:
+            return self.ids[name]
+        vendor_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = vendor_id
+        for token in _ngram_tokens(name, self.ngram_size):
+            self.frequency[token] = self.frequency.get(token, 0) + 1
+            self.postings.setdefault((token, len(name)), []).append(vendor_id)
+        self.by_length.setdefault(len(name), []).append(vendor_id)
+        return vendor_id
+
+    def candidates(self, name, threshold=90):
+        """
+        Ids of known names that could reach the threshold against `name`.
+        """
+        name = str(name)
+        tokens = sorted(_ngram_tokens(name, self.ngram_size), key=lambda token: (self.frequency.get(token, 0), token))
+        found = set()
+        for other, ids in self.by_length.items():
+            if _ratio_upper_bound(len(name), other) < threshold:
+                continue
+            shared = _min_shared_ngrams(len(name), other, threshold, self.ngram_size)
+            if shared <= 0:
+                found.update(ids)
+                continue
+            for token in tokens[:len(tokens) - shared + 1]:
+                found.update(self.postings.get((token, other), ()))
+        return found
+
+    def query(self, name, threshold=90):
+        """
+        Known names scoring at or above the threshold against `name`, as
+        (name, score) pairs, best first. A name already in the index matches
+        itself with 100.
+        """
+        name = str(name)
+        ids = sorted(self.candidates(name, threshold))
+        matches = []
+        if self.backend == "rapidfuzz" and ids:
+            scores = rf_process.cdist([name], [self.names[k] for k in ids],
+                                      scorer=rf_fuzz.ratio, score_cutoff=max(threshold - 0.5, 0),
+                                      dtype=np.float32)[0]
+            rounded, hits = _rapidfuzz_matches(scores, threshold)
+            matches = [(self.names[ids[c]], int(rounded[c])) for c in np.flatnonzero(hits)]
+        else:
+            for vendor_id in ids:
+                score = fuzz.ratio(name, self.names[vendor_id])
+                if score >= threshold:
+                    matches.append((self.names[vendor_id], score))
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+def _match_vendor_names(names, threshold, blocking, ngram_size, backend, workers, chunk_size, processes,
+                        minhash_bands, minhash_rows):
+    """
+    (i, j, score) for every pair of names at or above the threshold, i < j;
+    with blocking="minhash", for the pairs LSH proposes.
+    """
+    if blocking == "ngram":
+        rows = _blocked_candidate_pairs(names, threshold, ngram_size)
+    elif blocking == "minhash":
+        rows = _minhash_candidate_pairs(names, ngram_size, minhash_bands, minhash_rows)
+    else:
+        rows = None
+    if processes > 1:
+        return _score_sharded(names, rows, threshold, backend, chunk_size, processes)
+    if rows is None:
+        order, stops = _length_order(names, threshold)
+        return _score_length_sorted(names, order, stops, 0, len(names), threshold, backend, workers, chunk_size)
+    if backend == "rapidfuzz":
+        return _score_pairs_rapidfuzz(names, rows, threshold, workers, chunk_size)
+    return _score_pairs(names, rows, threshold)
+
+def _match_with_cache(names, threshold, cache, backend, workers, match):
+    """
+    Answer pairs between names the cache already holds from disk and score
+    only pairs involving new names, then store those results.
+    """
+    cache.prepare(threshold)
+    floor = cache.threshold
+    known = cache.known(names)
+    stored = cache.names()
+    new = [name for name in dict.fromkeys(names) if name not in known]
+
+    new_matches = [(new[i], new[j], score) for i, j, score in match(new, floor)]
+    new_matches += [(new[i], stored[j], score) for i, j, score in _score_against(new, stored, floor, backend, workers)]
+    cache.add(new, new_matches, names)
+
+    total = len(names) * (len(names) - 1) // 2
+    hits = len(known) * (len(known) - 1) // 2
+    cache.hits += hits
+    cache.misses += total - hits
+    logging.info(f"Vendor similarity cache: {hits} pairs from cache, {total - hits} scored, {len(new)} new names")
+
+    position = {}
+    for k, name in enumerate(names):
+        position.setdefault(name, k)
+    matched = []
+    for a, b, score in cache.matches(names, threshold):
+        i, j = position[a], position[b]
+        matched.append((min(i, j), max(i, j), score))
+    cache.evict()
+    return matched
+
+def detect_fuzzy_duplicates(df, threshold=90, blocking=FUZZY_BLOCKING, ngram_size=FUZZY_NGRAM_SIZE,
+                            backend=FUZZY_BACKEND, workers=FUZZY_WORKERS, chunk_size=FUZZY_CHUNK_SIZE,
+                            processes=FUZZY_PROCESSES, cache=FUZZY_CACHE_PATH,
+                            minhash_bands=FUZZY_MINHASH_BANDS, minhash_rows=FUZZY_MINHASH_ROWS):
     """
     Detect similar vendor names using fuzzy matching.
+
+    Pairs whose lengths alone rule out the threshold are never scored, and with
+    blocking="ngram" only pairs sharing an n-gram block are. Either way the
+    matches are the same as scoring every pair.
+
+    blocking="minhash" is an approximate mode for very large vendor masters:
+    only pairs whose n-gram MinHash signatures collide in one of minhash_bands
+    LSH bands of minhash_rows values are scored. More bands or fewer rows per
+    band find more of the exact matches at the cost of more candidates.
+
+    backend="rapidfuzz" scores blocks of chunk_size vendors per native call
+    (spread over `workers` threads) instead of one pair at a time with thefuzz.
+    processes > 1 shards the pairs over a process pool.
+
+    cache (a VendorSimilarityCache or a path to one) reuses scores from earlier
+    runs so only pairs involving new vendor names are scored.
     """
+    if backend not in ("thefuzz", "rapidfuzz"):
+        raise ValueError(f"Unknown fuzzy matching backend: {backend}")
+    if backend == "rapidfuzz" and rf_process is None:
+        raise ImportError("The rapidfuzz backend requires the rapidfuzz package")
+
     vendors = df['vendor'].unique()
-    fuzzy_matches = []
-    
-    for i, v1 in enumerate(vendors):
-        for v2 in vendors[i+1:]:
-            score = fuzz.ratio(str(v1), str(v2))
-            if score >= threshold:
-                fuzzy_matches.append({
-                    'Vendor 1': v1,
-                    'Vendor 2': v2,
-                    'Similarity Score': score
-                })
+    names = [str(v) for v in vendors]
+
+    def match(names, threshold):
+        return _match_vendor_names(names, threshold, blocking, ngram_size, backend, workers, chunk_size, processes,
+                                   minhash_bands, minhash_rows)
+
+    if cache is None:
+        matched = match(names, threshold)
+    elif isinstance(cache, VendorSimilarityCache):
+        matched = _match_with_cache(names, threshold, cache, backend, workers, match)
+    else:
+        cache = VendorSimilarityCache(cache)
+        try:
+            matched = _match_with_cache(names, threshold, cache, backend, workers, match)
+        finally:
+            cache.close()
+    matched.sort()
+
+    fuzzy_matches = [{
+        'Vendor 1': vendors[i],
+        'Vendor 2': vendors[j],
+        'Similarity Score': score
+    } for i, j, score in matched]
     
     logging.info(f"Fuzzy matching detected {len(fuzzy_matches)} similar vendor name pairs")
     return pd.DataFrame(fuzzy_matches)
 
+# ----------------------------
+# Fused Detector Engine
+# ----------------------------
+def _column_codes(values):
+    """
+    Non-negative integer codes that are equal exactly where the values are equal (missing
+    values included), and the number of codes. Code 0 is reserved for missing values, so
+    callers can drop them with codes > 0. Categorical columns reuse their codes and
+    amounts held to the cent map straight to cents; anything else goes through pd.factorize.
+    """
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        # Categories are already distinct, so their codes are the answer
+        return values.cat.codes.to_numpy().astype(np.int64) + 1, len(values.cat.categories) + 1
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf" and len(values) > 0:
+        with np.errstate(invalid='ignore'):
+            cents = np.round(values * 100)
+            exact = np.isfinite(cents).all() and (cents / 100 == values).all()
+        if exact and cents.max() - cents.min() < 2 ** 53:
+            cents = cents.astype(np.int64)
+            return cents - cents.min() + 1, int(cents.max() - cents.min()) + 2
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64) + 1, len(uniques) + 1
+
+def _duplicate_mask(columns):
+    """
+    True for every row whose values in all the given columns also occur in another row,
+    like DataFrame.duplicated(keep=False). Missing values compare equal to each other.
+    Columns are passed as (codes, count) pairs from _column_codes.
+    """
+    key, size = columns[0]
+    for codes, count in columns[1:]:
+        if size * count >= 2 ** 62:
+            # Re-factorize the combined key so it stays dense and cannot overflow
+            key, uniques = pd.factorize(key)
+            key, size = key.astype(np.int64), len(uniques)
+        key, size = key * count + codes, size * count
+    if len(key) <= 1:
+        return np.zeros(len(key), dtype=bool)
+    if size <= 4 * len(key):
+        return np.bincount(key, minlength=size)[key] > 1
+    order = np.argsort(key)
+    ordered = key[order]
+    repeated = ordered[1:] == ordered[:-1]
+    flagged = np.zeros(len(key), dtype=bool)
+    flagged[1:] |= repeated
+    flagged[:-1] |= repeated
+    mask = np.empty(len(key), dtype=bool)
+    mask[order] = flagged
+    return mask
+
+def _near_duplicate_mask(df, window_days, amount_tolerance=0):
+    """
+    True for payments with another payment to the same vendor at most window_days apart
+    whose amount differs by at most amount_tolerance. Rows missing a vendor, amount or
+    date are never flagged.
+
+    Rows are sorted on (vendor, amount, date) and swept instead of self-joined. Within a
+    run of equal amounts the rows are sorted by date, so comparing neighbours is enough.
+    With a tolerance, each run is a group and every row still unflagged looks up the first
+    payment at most window_days earlier in the d-th group above and below its own with a
+    searchsorted on the sorted (group, date) key, for d = 1, 2, ... while any of those
+    groups is still the same vendor and inside the tolerance.
+    """
+    vendors, vendor_count = _column_codes(df['vendor'])
+    amounts = df['amount'].to_numpy(dtype=np.float64, na_value=np.nan)
+    dates = parse_dates(df['date']).astype("datetime64[ns]", copy=False)
+    rows = np.flatnonzero((vendors > 0) & ~np.isnan(amounts) & ~np.isnat(dates))
+    # Amounts and dates as sorted ranks, so one int64 key orders the rows; an argsort of it
+    # is several times faster than lexsort over the three columns. Temporaries are
+    # released as soon as possible, since this has to fit tens of millions of rows
+    amount_ranks, amount_values = pd.factorize(amounts[rows], sort=True)
+    date_ranks, date_values = pd.factorize(dates[rows], sort=True)
+    if vendor_count * len(amount_values) * len(date_values) < 2 ** 63:
+        key = vendors[rows]
+        key *= len(amount_values)
+        key += amount_ranks
+        del amount_ranks
+        key *= len(date_values)
+        key += date_ranks
+        del date_ranks
+        order = np.argsort(key)
+        del key
+    else:
+        order = np.lexsort((date_ranks, amount_ranks, vendors[rows]))
+        del amount_ranks, date_ranks
+    order = rows[order]
+    del rows
+    vendors, amounts, dates = vendors[order], amounts[order], dates[order].view(np.int64)
+    window = int(window_days * 86_400_000_000_000)
+    # Float amounts like 100.01 - 100.00 overshoot a 0.01 tolerance by a few ulps
+    tolerance = amount_tolerance + 1e-9
+
+    flagged = np.zeros(len(order), dtype=bool)
+    # Equal amounts are sorted by date, so a neighbour is the closest payment
+    same = (vendors[1:] == vendors[:-1]) & (amounts[1:] == amounts[:-1])
+    close = same & (dates[1:] - dates[:-1] <= window)
+    flagged[1:] |= close
+    flagged[:-1] |= close
+    del close
+
+    if amount_tolerance > 0 and len(order):
+        groups = np.concatenate(([0], np.cumsum(~same)))
+        starts = np.flatnonzero(np.concatenate(([True], ~same)))
+        del same
+        ends = np.append(starts[1:], len(order))
+        group_vendors, group_amounts = vendors[starts], amounts[starts]
+        date_values = np.unique(dates)
+        key = groups * len(date_values)
+        key += np.searchsorted(date_values, dates)
+        # Rank of the earliest date inside the window before each row
+        earliest = np.searchsorted(date_values, dates - window)
+        for direction in (1, -1):
+            rows = np.flatnonzero(~flagged)
+            distance = 1
+            while len(rows):
+                target = groups[rows] + direction * distance
+                inside = (target >= 0) & (target < len(starts))
+                rows, target = rows[inside], target[inside]
+                inside = (group_vendors[target] == vendors[rows]) & (np.abs(group_amounts[target] - amounts[rows]) <= tolerance)
+                rows, target = rows[inside], target[inside]
+                first = np.searchsorted(key, target * len(date_values) + earliest[rows])
+                hit = first < ends[target]
+                hit[hit] = dates[first[hit]] <= dates[rows[hit]] + window
+                flagged[rows[hit]] = True
+                rows = rows[~hit]
+                distance += 1
+
+    mask = np.zeros(len(df), dtype=bool)
+    mask[order] = flagged
+    return mask
+
+def _split_transaction_mask(df, threshold, window_days, by=SPLIT_GROUPS):
+    """
+    detect_split_transactions_mask. For each grouping column, the sub-threshold payments
+    are sorted by (group, date) and a two-pointer window found with searchsorted: each
+    payment ends a window starting at the group's first payment at most window_days
+    earlier. Window sums come from a running total in cents, so they are exact, and every
+    payment inside a window with at least two parts and a sum of threshold or more is
+    flagged through a +1/-1 difference array.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    amounts = df['amount'].to_numpy(dtype=np.float64, na_value=np.nan)
+    dates = parse_dates(df['date']).astype("datetime64[ns]", copy=False)
+    with np.errstate(invalid='ignore'):
+        parts = np.flatnonzero((amounts > 0) & (amounts < threshold) & ~np.isnat(dates))
+    cents = np.round(amounts[parts] * 100).astype(np.int64)
+    date_ranks, date_values = pd.factorize(dates[parts], sort=True)
+    # Rank of the earliest date inside the window ending at each distinct date
+    window_start = np.searchsorted(date_values, date_values - np.timedelta64(int(window_days * 86_400_000_000_000), "ns"))
+    limit = int(round(threshold * 100))
+
+    for column in by:
+        if column not in df.columns:
+            continue
+        groups = _column_codes(df[column])[0][parts]
+        rows = np.flatnonzero(groups > 0)
+        ranks = date_ranks[rows]
+        key = groups[rows] * len(date_values) + ranks
+        # Ties within a group and date may come in any order: the window ending at the last
+        # of them has the same start and includes the others, so the flagged rows are the same
+        order = np.argsort(key)
+        key, ranks = key[order], ranks[order]
+        ends = np.arange(len(order))
+        starts = np.searchsorted(key, key - ranks + window_start[ranks])
+        totals = np.concatenate(([0], np.cumsum(cents[rows][order])))
+        hit = (totals[ends + 1] - totals[starts] >= limit) & (ends > starts)
+        cover = np.bincount(starts[hit], minlength=len(order) + 1) - np.bincount(ends[hit] + 1, minlength=len(order) + 1)
+        mask[parts[rows[order[np.cumsum(cover)[:-1] > 0]]]] = True
+    return mask
+
+def run_detectors(df, threshold=THRESHOLD_AMOUNT, history=DUPLICATE_HISTORY_PATH, window_days=DUPLICATE_WINDOW_DAYS,
+                  amount_tolerance=DUPLICATE_AMOUNT_TOLERANCE, split_window_days=SPLIT_WINDOW_DAYS,
+                  limits=THRESHOLD_LIMITS):
+    """
+    Run the duplicate, unusual timing, round-number and threshold detectors plus the
+    Benford digit counts from a single pass over shared arrays, without copying or
+    modifying df. Dates are factorized once: the codes feed the duplicate key and only
+    the distinct dates are parsed for the weekend check. Duplicates also match payments
+    recorded in history and, with window_days set, near duplicates, as in
+    detect_duplicate_payments; threshold flags include split transactions when
+    split_window_days is set and are checked against the tiers in limits when given,
+    as in detect_threshold_avoidance.
+    Returns {"indices": {detector: row positions}, "counts": {detector: flagged rows},
+    "flagged": {detector: FlaggedRows}, "benford": BenfordAccumulator of the amounts,
+    "tiers": limit avoided by each threshold flag, or None without limits};
+    the positions select the same rows as the individual detect_* functions via df.iloc.
+    """
+    date_codes, date_values = pd.factorize(df['date'])
+    amounts = df['amount'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Missing dates get code -1 and pick up the trailing False
+    weekend = _weekend_mask(parse_dates(date_values))
+    with np.errstate(invalid='ignore'):
+        masks = {
+            # Duplicates compare the date values as given, like detect_duplicate_payments
+            "duplicates": _duplicate_mask([
+                (date_codes.astype(np.int64) + 1, len(date_values) + 1),
+                _column_codes(df['vendor']),
+                _column_codes(amounts),
+            ]),
+            "unusual_timing": np.append(weekend, False)[date_codes],
+            "round_numbers": amounts % 1000 == 0,
+            "threshold_flags": (amounts >= threshold * 0.9) & (amounts < threshold),
+        }
+    if history is not None:
+        masks["duplicates"] |= _seen_before(_duplicate_keys(df), history)
+    if window_days is not None:
+        masks["duplicates"] |= _near_duplicate_mask(df, window_days, amount_tolerance)
+    tiers = None
+    if limits is not None:
+        tiers = _threshold_tiers(df, threshold, limits)
+        masks["threshold_flags"] = ~np.isnan(tiers)
+    if split_window_days is not None:
+        masks["threshold_flags"] |= _split_transaction_mask(df, threshold, split_window_days)
+    indices = {name: np.flatnonzero(mask) for name, mask in masks.items()}
+    counts = {name: len(index) for name, index in indices.items()}
+
+    print(f"Duplicate payments flagged: {counts['duplicates']}")
+    print(f"Unusual timing flagged: {counts['unusual_timing']}")
+    print(f"Round-number abuse flagged: {counts['round_numbers']}")
+    print(f"Threshold avoidance flagged: {counts['threshold_flags']}")
+    logging.info(f"Ran fused detectors on {len(df)} transactions: {counts}")
+
+    return {
+        "indices": indices,
+        "counts": counts,
+        "flagged": {name: FlaggedRows(df, index) for name, index in indices.items()},
+        "benford": BenfordAccumulator().update(amounts),
+        "tiers": None if tiers is None else tiers[indices["threshold_flags"]]
+    }
+
+# ----------------------------
+# Streaming Detectors
+# ----------------------------
+def _duplicate_keys(df):
+    """
+    64-bit hash of each row's date, amount and vendor, normalized so values that
+    DataFrame.duplicated treats as equal hash equal whatever dtype the chunk inferred.
+    """
+    amounts = df['amount'].to_numpy(dtype=np.float64, na_value=np.nan) + 0.0  # -0.0 -> 0.0
+    vendors = df['vendor'].astype(object)
+    return pd.util.hash_pandas_object(pd.DataFrame({
+        'date': parse_dates(df['date']),
+        'amount': np.where(np.isnan(amounts), np.nan, amounts),
+        'vendor': vendors.where(vendors.notna(), None).to_numpy(dtype=object),
+    }), index=False).to_numpy()
+
+class StreamingDetectors:
+    """
+    Runs the detectors over a file chunk by chunk. Timing, round-number, threshold and
+    Benford results are per row and just add up; duplicates need every earlier chunk, so
+    the date/amount/vendor key of each row is kept as a 64-bit hash (8 bytes a row) and
+    counted at the end. counts() matches run_detectors on the whole file, barring a hash
+    collision between different keys. Only exact duplicates are counted: the hashes
+    cannot tell how far apart two payments are, so window_days is not applied. Split
+    transactions can span chunks, so split_window_days is not applied either.
+    """
+
+    def __init__(self, threshold=THRESHOLD_AMOUNT, history=DUPLICATE_HISTORY_PATH):
+        self.threshold = threshold
+        self.history = history
+        self.rows = 0
+        self.flagged = {"unusual_timing": 0, "round_numbers": 0, "threshold_flags": 0}
+        self.benford = BenfordAccumulator()
+        self.keys = []
+
+    def update(self, df):
+        self.rows += len(df)
+        self.flagged["unusual_timing"] += int(detect_unusual_timing_mask(df).sum())
+        self.flagged["round_numbers"] += int(detect_round_number_abuse_mask(df).sum())
+        self.flagged["threshold_flags"] += int(detect_threshold_avoidance_mask(df, self.threshold, None).sum())
+        self.benford.update(df['amount'].to_numpy(dtype=np.float64, na_value=np.nan))
+        self.keys.append(_duplicate_keys(df))
+        return self
+
+    def duplicate_count(self):
+        """
+        Rows whose key occurs more than once across all chunks seen so far.
+        """
+        if not self.keys:
+            return 0
+        keys = np.concatenate(self.keys)
+        self.keys = [keys]
+        # Sorted in place, equal keys are neighbours: a row is a duplicate when it matches either side
+        keys.sort()
+        repeated = keys[1:] == keys[:-1]
+        duplicate = np.zeros(len(keys), dtype=bool)
+        duplicate[1:] |= repeated
+        duplicate[:-1] |= repeated
+        if self.history is not None:
+            duplicate |= _seen_before(keys, self.history)
+        return int(duplicate.sum())
+
+    def counts(self):
+        counts = {"duplicates": self.duplicate_count(), **self.flagged}
+        print(f"Duplicate payments flagged: {counts['duplicates']}")
+        print(f"Unusual timing flagged: {counts['unusual_timing']}")
+        print(f"Round-number abuse flagged: {counts['round_numbers']}")
+        print(f"Threshold avoidance flagged: {counts['threshold_flags']}")
+        logging.info(f"Streamed detectors over {self.rows} transactions: {counts}")
+        return counts
+
+# ----------------------------
+# Duplicate Payment History
+# ----------------------------
+# Keys are hashed and inserted a million at a time to bound the temporary arrays
+_KEY_BLOCK = 1 << 20
+
+class KeyBloomFilter:
+    """
+    Bloom filter over 64-bit payment keys, sized for `capacity` keys at the given false
+    positive rate. contains() never misses a key that was added and wrongly reports an
+    absent one with about that probability, so only its hits need an exact lookup. The
+    k bit positions come from double hashing (key + i * mix(key)) in a power-of-two bit
+    array, and are checked one hash at a time so absent keys drop out after the first.
+    """
+
+    def __init__(self, capacity=DUPLICATE_FILTER_CAPACITY, false_positive_rate=DUPLICATE_FILTER_FPR):
+        self.capacity = int(capacity)
+        self.false_positive_rate = false_positive_rate
+        self.hashes = max(1, int(np.ceil(-np.log2(false_positive_rate))))
+        # m = -n ln p / ln(2)^2 bits, rounded up to a power of two so positions are a mask away
+        bits = -self.capacity * np.log(false_positive_rate) / np.log(2) ** 2
+        self.size = 1 << max(int(np.ceil(np.log2(max(bits, 64)))), 6)
+        self.bits = np.zeros(self.size // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _position(self, keys, steps, i):
+        return (keys + np.uint64(i) * steps) & np.uint64(self.size - 1)
+
+    def add(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        for start in range(0, len(keys), _KEY_BLOCK):
+            block = keys[start:start + _KEY_BLOCK]
+            steps = _mix64(block) | np.uint64(1)
+            for i in range(self.hashes):
+                position = self._position(block, steps, i)
+                np.bitwise_or.at(self.bits, position >> np.uint64(3), np.left_shift(1, position & np.uint64(7)).astype(np.uint8))
+        return self
+
+    def contains(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        candidates = np.arange(len(keys))
+        steps = _mix64(keys) | np.uint64(1)
+        for i in range(self.hashes):
+            position = self._position(keys[candidates], steps[candidates], i)
+            candidates = candidates[(self.bits[position >> np.uint64(3)] >> (position & np.uint64(7))) & 1 == 1]
+        found = np.zeros(len(keys), dtype=bool)
+        found[candidates] = True
+        return found
+
+    def save(self, path):
+        # Written beside the target and renamed over it, so a crash never leaves half a filter
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, bits=self.bits, meta=np.array([self.capacity, self.count]), false_positive_rate=self.false_positive_rate)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            capacity, count = data["meta"].tolist()
+            bloom = cls(capacity, float(data["false_positive_rate"]))
+            if len(data["bits"]) != len(bloom.bits):
+                raise ValueError(f"{path} does not match its stored capacity")
+            bloom.bits = data["bits"]
+            bloom.count = count
+        return bloom
+
+class PaymentHistory:
+    """
+    SQLite index of every payment recorded from earlier batches, so duplicates paid
+    months apart are caught. Payments are stored by the 64-bit hash of their normalized
+    date, amount and vendor (the key StreamingDetectors uses) with the number of times
+    it was paid; the key is the table's integer primary key, so a batch is checked with
+    one B-tree probe per distinct key whatever the size of the history.
+
+    Most keys in a new batch were never paid before, so a KeyBloomFilter of the stored
+    keys sits in front of the table and only its hits reach SQLite. It is kept beside the
+    database as <path>.bloom, rebuilt from the table when missing or out of date, and
+    doubled in capacity whenever the history outgrows it.
+    """
+
+    def __init__(self, path=DUPLICATE_HISTORY_PATH, capacity=DUPLICATE_FILTER_CAPACITY,
+                 false_positive_rate=DUPLICATE_FILTER_FPR):
+        self.path = path
+        self.filter_path = None if path == ":memory:" else f"{path}.bloom"
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS payments (key INTEGER PRIMARY KEY, payments INTEGER NOT NULL);
+            CREATE TEMP TABLE IF NOT EXISTS batch_keys (key INTEGER PRIMARY KEY);
+        """)
+        self.bloom = None
+        if self.filter_path and os.path.exists(self.filter_path):
+            try:
+                self.bloom = KeyBloomFilter.load(self.filter_path)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Rebuilding unreadable payment filter {self.filter_path}: {e}")
+        # A filter that missed some of the table's keys would hide duplicates
+        if self.bloom is None or self.bloom.count != len(self):
+            self.rebuild_filter(capacity, false_positive_rate)
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM payments")
+        self.rebuild_filter()
+
+    def rebuild_filter(self, capacity=None, false_positive_rate=None):
+        """
+        Build the filter again from every stored key, for at least twice the keys held now.
+        """
+        stored = len(self)
+        capacity = max(capacity or self.bloom.capacity, 2 * stored)
+        bloom = KeyBloomFilter(capacity, false_positive_rate or self.bloom.false_positive_rate)
+        cursor = self.connection.execute("SELECT key FROM payments")
+        while rows := cursor.fetchmany(_KEY_BLOCK):
+            bloom.add(np.array(rows, dtype=np.int64).ravel().view(np.uint64))
+        bloom.count = stored
+        self.bloom = bloom
+        if self.filter_path:
+            bloom.save(self.filter_path)
+        logging.info(f"Built payment filter of {bloom.size // 8 // 2 ** 20} MB for {stored} keys")
+        return bloom
+
+    @staticmethod
+    def _keys(keys):
+        # SQLite integers are signed, so the hashes are stored bit for bit as int64
+        return np.asarray(keys, dtype=np.uint64).view(np.int64)
+
+    def contains(self, keys):
+        """
+        Boolean array, True where the key was recorded by an earlier add().
+        """
+        keys = self._keys(keys)
+        # Keys the filter rules out are certainly new; the rest are looked up exactly
+        candidates = np.unique(keys[self.bloom.contains(keys.view(np.uint64))])
+        if len(candidates) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        with self.connection:
+            self.connection.execute("DELETE FROM batch_keys")
+            self.connection.executemany("INSERT INTO batch_keys (key) VALUES (?)", zip(candidates.tolist()))
+            found = [row[0] for row in self.connection.execute("SELECT key FROM batch_keys JOIN payments USING (key)")]
+        return np.isin(keys, np.array(found, dtype=np.int64))
+
+    def add(self, keys):
+        """
+        Record a batch of payment keys (from _duplicate_keys) or a frame of payments.
+        """
+        if isinstance(keys, pd.DataFrame):
+            keys = _duplicate_keys(keys)
+        unique, counts = np.unique(self._keys(keys), return_counts=True)
+        new = unique[~self.contains(unique)]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO payments (key, payments) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET payments = payments + excluded.payments",
+                zip(unique.tolist(), counts.tolist())
+            )
+        self.bloom.add(new.view(np.uint64))
+        self.bloom.count += len(new)
+        if self.bloom.count > self.bloom.capacity:
+            self.rebuild_filter()
+        elif self.filter_path:
+            self.bloom.save(self.filter_path)
+        return self
+
+def _seen_before(keys, history):
+    """
+    contains() on history, opening and closing it first when given as a path.
+    """
+    if isinstance(history, PaymentHistory):
+        return history.contains(keys)
+    history = PaymentHistory(history)
+    try:
+        return history.contains(keys)
+    finally:
+        history.close()
+
 # ----------------------------
 # Risk Summary & Export
 # ----------------------------
-def generate_risk_summary(duplicate, timing, round_number, threshold, output_file="outputs/risk_summary.csv"):
+def _flagged_count(flagged):
+    # Detectors hand over flagged rows; streaming runs only have a count
+    return int(flagged) if isinstance(flagged, (int, np.integer)) else len(flagged)
+
+def export_flagged_rows(flagged, output_file="outputs/flagged_transactions.parquet"):
+    """
+    Write the rows flagged by each detector to one Parquet file, with a 'detector' column
+    naming the check (a row flagged by two checks appears twice). flagged maps detector
+    names to FlaggedRows or DataFrames.
+    """
+    if pyarrow is None:
+        raise ImportError("Writing flagged rows as Parquet needs the pyarrow package: pip install pyarrow")
+    frames = []
+    for name, rows in flagged.items():
+        if isinstance(rows, (int, np.integer)):
+            raise ValueError("Flagged rows are not kept in streaming mode, only their counts")
+        frames.append((rows.frame if isinstance(rows, FlaggedRows) else rows).assign(detector=name))
+    pd.concat(frames, ignore_index=True).to_parquet(output_file, index=False)
+    print(f"Flagged transactions exported to {output_file}")
+    logging.info(f"Flagged transactions exported to {output_file}")
+
+def generate_risk_summary(duplicate, timing, round_number, threshold, output_file="outputs/risk_summary.csv",
+                          flagged_file=None):
     summary = {
         "Metric": ["Duplicate Payments", "Unusual Timing", "Round-Number Abuse", "Threshold Avoidance"],
-        "Count": [len(duplicate), len(timing), len(round_number), len(threshold)]
+        "Count": [_flagged_count(flagged) for flagged in (duplicate, timing, round_number, threshold)]
     }
     df_summary = pd.DataFrame(summary)
     df_summary.to_csv(output_file, index=False)
@@ -140,12 +2062,15 @@ def generate_risk_summary(duplicate, timing, round_number, threshold, output_fil
     print(f"\nRisk summary exported to {output_file}")
     logging.info(f"Risk summary exported to {output_file}")
 
+    if flagged_file:
+        export_flagged_rows(dict(zip(summary["Metric"], (duplicate, timing, round_number, threshold))), flagged_file)
+
 def visualize_anomalies(duplicate, timing, round_number, threshold, output_file="outputs/anomaly_summary.png"):
     """
     Create a bar chart of flagged anomalies and save as PNG.
     """
     labels = ["Duplicate Payments", "Unusual Timing", "Round-Number Abuse", "Threshold Avoidance"]
-    counts = [len(duplicate), len(timing), len(round_number), len(threshold)]
+    counts = [_flagged_count(flagged) for flagged in (duplicate, timing, round_number, threshold)]
 
     plt.figure(figsize=(10,6))
     bars = plt.bar(labels, counts, color='teal')
@@ -167,21 +2092,62 @@ def visualize_anomalies(duplicate, timing, round_number, threshold, output_file=
 # ----------------------------
 # Main
 # ----------------------------
-def main():
+def main(file_path="data/sample_transactions.csv", chunk_size=CHUNK_SIZE):
+    # Payments are checked against earlier runs, then recorded for the next ones
+    history = PaymentHistory(DUPLICATE_HISTORY_PATH) if DUPLICATE_HISTORY_PATH else None
+    try:
+        _run(file_path, chunk_size, history)
+    finally:
+        if history is not None:
+            history.close()
+
+def _run(file_path, chunk_size, history):
+    if chunk_size:
+        # Streaming mode: bounded memory, counts only
+        skipped = [key for key, value in (("duplicate_window_days", DUPLICATE_WINDOW_DAYS),
+                                          ("split_window_days", SPLIT_WINDOW_DAYS)) if value is not None]
+        if skipped:
+            # Windows across rows are not tracked between chunks, so the counts differ from an in-memory run
+            message = f"Ignoring {', '.join(skipped)} in streaming mode (chunk_size is set); unset chunk_size to apply them"
+            print(f"Warning: {message}")
+            logging.warning(message)
+        stream = StreamingDetectors(history=history)
+        try:
+            for chunk in iter_transactions(file_path, chunk_size):
+                stream.update(chunk)
+        except Exception as e:
+            print(f"Error loading CSV: {e}")
+            logging.error(f"Error loading CSV: {e}")
+            return
+        if stream.rows == 0:
+            print("No transactions to process.")
+            return
+        counts = stream.counts()
+        if history is not None:
+            history.add(np.concatenate(stream.keys))
+        flagged = [counts[name] for name in ["duplicates", "unusual_timing", "round_numbers", "threshold_flags"]]
+        generate_risk_summary(*flagged)
+        visualize_anomalies(*flagged)
+        return
+
     # File path for root directory execution
-    file_path = "data/sample_transactions.csv"
     df = load_transactions(file_path)
     
     if not df.empty:
-        duplicates = detect_duplicate_payments(df)
-        unusual = detect_unusual_timing(df)
-        round_num = detect_round_number_abuse(df)
-        threshold_flags = detect_threshold_avoidance(df)
+        # Only counts are needed here, so the flagged rows are never copied out of df
+        results = run_detectors(df, history=history)
+        if history is not None:
+            history.add(df)
+        duplicates, unusual, round_num, threshold_flags = (
+            results["flagged"][name]
+            for name in ["duplicates", "unusual_timing", "round_numbers", "threshold_flags"]
+        )
         
-        generate_risk_summary(duplicates, unusual, round_num, threshold_flags)
+        generate_risk_summary(duplicates, unusual, round_num, threshold_flags, flagged_file=FLAGGED_OUTPUT)
         visualize_anomalies(duplicates, unusual, round_num, threshold_flags)
     else:
         print("No transactions to process.")
 
 if __name__ == "__main__":
-    main()
+    # Optional argument: a CSV/Parquet/Arrow file, a directory or a glob pattern
+    main(*sys.argv[1:2])
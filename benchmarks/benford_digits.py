@@ -0,0 +1,57 @@
+"""
+Leading-digit extraction for analyze_benford: the old per-row str() apply
+against the vectorized log10/floor path, and the cost of running every
+analyze_benford_tests test on top of it.
+
+Usage: python benchmarks/benford_digits.py [sizes...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from main import _leading_digits, analyze_benford, analyze_benford_tests
+
+
+def apply_digits(amounts):
+    """
+    The previous implementation, kept here as the baseline.
+    """
+    return amounts.apply(lambda x: int(str(abs(x))[0]) if abs(x) >= 1 else None).dropna()
+
+
+def make_amounts(size, seed=0):
+    """
+    Log-uniform amounts between 1 and 10M rounded to cents, which follow Benford's Law.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.round(10 ** rng.uniform(0, 7, size), 2))
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [100_000, 1_000_000, 10_000_000]
+    print(f"{'amounts':>11} {'apply (s)':>10} {'vector (s)':>11} {'benford (s)':>12} {'all tests (s)':>14} {'speedup':>8}")
+    for size in sizes:
+        amounts = make_amounts(size)
+
+        start = time.perf_counter()
+        expected = apply_digits(amounts)
+        apply_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        digits = _leading_digits(amounts.to_numpy())
+        vector_time = time.perf_counter() - start
+        assert (expected.to_numpy() == digits).all(), "leading digits differ"
+
+        start = time.perf_counter()
+        analyze_benford(pd.DataFrame({'amount': amounts}))
+        benford_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyze_benford_tests(pd.DataFrame({'amount': amounts}))
+        tests_time = time.perf_counter() - start
+
+        print(f"{size:>11,} {apply_time:>10.2f} {vector_time:>11.3f} {benford_time:>12.3f} {tests_time:>14.3f} {apply_time / vector_time:>8.0f}x")
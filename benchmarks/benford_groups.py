@@ -0,0 +1,61 @@
+"""
+Per-group Benford MAD: analyze_benford called once per group against the
+single grouped histogram in analyze_benford_groups.
+
+Usage: python benchmarks/benford_groups.py [rows] [groups]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from main import analyze_benford, analyze_benford_groups
+
+
+def make_grouped_amounts(rows, groups, seed=0):
+    """
+    Log-uniform (Benford) amounts spread over `groups` vendors, with one vendor
+    billing mostly just under 5,000.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "amount": np.round(10 ** rng.uniform(0, 6, rows), 2),
+        "vendor": pd.Series(rng.integers(0, groups, rows)).map("Vendor {:05d}".format)
+    })
+    df.loc[df["vendor"] == "Vendor 00042", "amount"] = 4950.0
+    return df
+
+
+def loop_mad(df, min_count):
+    """
+    The straightforward version: one analyze_benford call per group.
+    """
+    mads = {}
+    for vendor, group in df.groupby("vendor"):
+        analysis = analyze_benford(group)
+        if len(group) >= min_count and not analysis.empty:
+            mads[vendor] = np.abs(analysis["Actual"] - analysis["Expected"]).mean()
+    return pd.Series(mads).sort_values(ascending=False)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    groups = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    min_count = 20
+    df = make_grouped_amounts(rows, groups)
+
+    start = time.perf_counter()
+    grouped = analyze_benford_groups(df, by="vendor", top_n=10, min_count=min_count)
+    grouped_time = time.perf_counter() - start
+    print(f"{rows:,} rows, {groups:,} vendors: grouped histogram {grouped_time:.2f}s")
+    print(grouped.head(3).to_string(index=False))
+
+    start = time.perf_counter()
+    looped = loop_mad(df, min_count)
+    loop_time = time.perf_counter() - start
+    assert list(looped.index[:10]) == list(grouped["vendor"]), "top groups differ"
+    assert np.allclose(looped.to_numpy()[:10], grouped["MAD"].to_numpy())
+    print(f"per-group analyze_benford loop {loop_time:.2f}s ({loop_time / grouped_time:.0f}x slower)")
@@ -0,0 +1,77 @@
+"""
+Benford over a CSV ledger: loading the whole amount column for analyze_benford_tests
+against streaming it in chunks through BenfordAccumulator, split across shards and
+merged at the end. Reports time and peak traced memory for both.
+
+Usage: python benchmarks/benford_stream.py [rows] [chunk size] [shards]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from main import BenfordAccumulator, analyze_benford_tests
+
+
+def write_ledger(path, rows, seed=0):
+    """
+    Log-uniform (Benford) amounts with a date and vendor column, written in blocks.
+    """
+    rng = np.random.default_rng(seed)
+    block = 1_000_000
+    for start in range(0, rows, block):
+        size = min(block, rows - start)
+        pd.DataFrame({
+            "date": "2024-01-03",
+            "amount": np.round(10 ** rng.uniform(0, 6, size), 2),
+            "vendor": "ABC Supplies"
+        }).to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def load_all(path):
+    return analyze_benford_tests(pd.read_csv(path, usecols=["amount"]))
+
+
+def stream(path, chunk_size, shards):
+    # Round-robin chunks over shard accumulators, as independent workers would, then merge
+    accumulators = [BenfordAccumulator() for _ in range(shards)]
+    for number, chunk in enumerate(pd.read_csv(path, usecols=["amount"], chunksize=chunk_size)):
+        accumulators[number % shards].update(chunk["amount"].to_numpy())
+    total = BenfordAccumulator()
+    for accumulator in accumulators:
+        total.merge(accumulator)
+    return total.tests()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 250_000
+    shards = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ledger.csv")
+        write_ledger(path, rows)
+        print(f"{rows:,} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB CSV")
+
+        whole, whole_time, whole_peak = measure(lambda: load_all(path))
+        print(f"load all:   {whole_time:6.2f}s  peak {whole_peak:7.1f} MB")
+        streamed, stream_time, stream_peak = measure(lambda: stream(path, chunk_size, shards))
+        print(f"streamed:   {stream_time:6.2f}s  peak {stream_peak:7.1f} MB ({chunk_size:,}-row chunks, {shards} shards)")
+
+        for test in whole:
+            assert whole[test]["analysis"].equals(streamed[test]["analysis"]), test
@@ -0,0 +1,69 @@
+"""
+The same ledger loaded from CSV, Parquet and Arrow IPC through load_transactions, in
+full and restricted to one quarter. Parquet and Arrow apply the date range in the
+reader; CSV has to parse everything first. Each load runs in a fresh process.
+
+Usage: python benchmarks/columnar_ingest.py [rows]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from synthetic import make_transactions
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+LOAD = """
+import sys, time
+sys.path.append({api!r})
+import main
+start = time.perf_counter()
+df = main.load_transactions({path!r}, date_range={date_range!r})
+elapsed = time.perf_counter() - start
+peak = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(f"RESULT {{elapsed:.2f}} {{int(peak) // 1024}} {{len(df)}}")
+"""
+
+
+def load(path, date_range, directory):
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD.format(api=API, path=path, date_range=date_range)],
+        cwd=directory, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, peak, rows = output.split("RESULT ")[1].split()
+    return float(elapsed), int(peak), int(rows)
+
+
+if __name__ == "__main__":
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        sys.exit("pyarrow is needed for Parquet and Arrow files: pip install pyarrow")
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    quarter = ("2024-04-01", "2024-06-30")
+
+    with tempfile.TemporaryDirectory() as directory:
+        df = make_transactions(rows)
+        paths = {"csv": os.path.join(directory, "ledger.csv")}
+        df.to_csv(paths["csv"], index=False)
+        # Columnar exports keep real timestamps, sorted so row-group statistics can prune
+        df["date"] = pd.to_datetime(df["date"])
+        df = df.sort_values("date", ignore_index=True)
+        paths["parquet"] = os.path.join(directory, "ledger.parquet")
+        df.to_parquet(paths["parquet"], index=False, row_group_size=250_000)
+        paths["arrow"] = os.path.join(directory, "ledger.arrow")
+        # Uncompressed, so the memory map can be read in place
+        df.to_feather(paths["arrow"], compression="uncompressed")
+        del df
+
+        print(f"{rows:,} transactions")
+        print(f"{'format':>8} {'size (MB)':>10} {'full (s)':>9} {'peak (MB)':>10} {'quarter (s)':>12} {'peak (MB)':>10} {'rows':>9}")
+        for name, path in paths.items():
+            full_time, full_peak, _ = load(path, None, directory)
+            quarter_time, quarter_peak, quarter_rows = load(path, quarter, directory)
+            print(f"{name:>8} {os.path.getsize(path) / 2 ** 20:>10.0f} {full_time:>9.2f} {full_peak:>10d} "
+                  f"{quarter_time:>12.2f} {quarter_peak:>10d} {quarter_rows:>9,}")
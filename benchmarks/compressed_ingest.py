@@ -0,0 +1,90 @@
+"""
+Decompression plus parse throughput for each codec exports arrive in: the same ledger
+as plain CSV, .csv.gz, .csv.zst and .zip, read whole by load_transactions and chunk by
+chunk by iter_transactions. Each read runs in a fresh process so peak RSS can be
+compared; throughput is uncompressed CSV megabytes and rows per second.
+
+Usage: python benchmarks/compressed_ingest.py [rows] [chunk size]
+"""
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+from synthetic import make_transactions
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+READ = """
+import sys, time
+sys.path.append({api!r})
+import main
+start = time.perf_counter()
+if {chunk_size!r}:
+    rows = sum(len(chunk) for chunk in main.iter_transactions({path!r}, chunk_size={chunk_size!r}))
+else:
+    rows = len(main.load_transactions({path!r}))
+elapsed = time.perf_counter() - start
+peak = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(f"RESULT {{elapsed:.2f}} {{int(peak) // 1024}} {{rows}}")
+"""
+
+
+def read(path, chunk_size, directory):
+    output = subprocess.run(
+        [sys.executable, "-c", READ.format(api=API, path=path, chunk_size=chunk_size)],
+        cwd=directory, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, peak, rows = output.split("RESULT ")[1].split()
+    return float(elapsed), int(peak), int(rows)
+
+
+def compress(path, codec):
+    """
+    Copy of the CSV at path compressed with codec; None when the codec is unavailable.
+    """
+    if codec == "none":
+        return path
+    target = path + {"gzip": ".gz", "zstd": ".zst", "zip": ".zip"}[codec]
+    if codec == "zip":
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(path, os.path.basename(path))
+        return target
+    with open(path, "rb") as source, open(target, "wb") as out:
+        if codec == "gzip":
+            with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as stream:
+                shutil.copyfileobj(source, stream)
+        elif zstandard is None:
+            return None
+        else:
+            zstandard.ZstdCompressor(level=3).copy_stream(source, out)
+    return target
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ledger.csv")
+        make_transactions(rows).to_csv(path, index=False)
+        size = os.path.getsize(path) / 2 ** 20
+        print(f"{rows} rows, {size:.0f} MB uncompressed, chunks of {chunk_size}")
+        print(f"{'codec':>6} {'size MB':>8} {'mode':>7} {'time (s)':>9} {'MB/s':>7} {'rows/s':>10} {'peak MB':>8}")
+        for codec in ("none", "gzip", "zstd", "zip"):
+            target = compress(path, codec)
+            if target is None:
+                print(f"{codec:>6}  skipped: codec package not installed")
+                continue
+            compressed = os.path.getsize(target) / 2 ** 20
+            for mode, chunks in (("load", None), ("stream", chunk_size)):
+                elapsed, peak, count = read(target, chunks, directory)
+                assert count == rows, (codec, mode, count)
+                print(f"{codec:>6} {compressed:8.0f} {mode:>7} {elapsed:9.2f} {size / elapsed:7.0f} {rows / elapsed:10.0f} {peak:8}")
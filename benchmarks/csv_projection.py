@@ -0,0 +1,77 @@
+"""
+Loading a wide ERP-style export: every column with inferred dtypes, as load_transactions
+used to, against the column projection and categorical text columns it uses now.
+Each load runs in a fresh process so peak RSS can be compared; the frame's own size
+comes from memory_usage(deep=True).
+
+Usage: python benchmarks/csv_projection.py [rows] [extra columns]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from synthetic import make_transactions
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+LOAD = """
+import sys, time
+sys.path.append({api!r})
+import main
+start = time.perf_counter()
+df = main.load_transactions({path!r}, columns={columns}, engine={engine!r})
+elapsed = time.perf_counter() - start
+frame = df.memory_usage(deep=True).sum() / 2 ** 20
+peak = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(f"RESULT {{elapsed:.2f}} {{frame:.0f}} {{int(peak) // 1024}} {{len(df.columns)}}")
+"""
+
+
+def make_wide_export(rows, extra, seed=0):
+    """
+    make_transactions plus `extra` ERP columns: codes, free text and numbers.
+    """
+    rng = np.random.default_rng(seed)
+    df = make_transactions(rows, seed=seed)
+    for i in range(extra):
+        if i % 3 == 0:
+            df[f"segment_{i}"] = rng.integers(100, 999, rows)
+        elif i % 3 == 1:
+            df[f"reference_{i}"] = np.char.add("REF", rng.integers(0, 10 ** 6, rows).astype(str))
+        else:
+            df[f"rate_{i}"] = np.round(rng.random(rows), 4)
+    return df
+
+
+def load(path, columns, engine, directory):
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD.format(api=API, path=path, columns=columns, engine=engine)],
+        cwd=directory, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, frame, peak, width = output.split("RESULT ")[1].split()
+    return float(elapsed), int(frame), int(peak), int(width)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    extra = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "wide.csv")
+        make_wide_export(rows, extra).to_csv(path, index=False)
+        print(f"{rows:,} rows x {7 + extra} columns, {os.path.getsize(path) / 2 ** 20:.0f} MB CSV")
+        print(f"{'load':>34} {'time (s)':>9} {'frame (MB)':>11} {'peak RSS (MB)':>14}")
+
+        # columns is evaluated in the child, where main is imported
+        runs = [("all columns, inferred dtypes", "None", "c"), ("projected, categorical text", "main.CSV_COLUMNS", "c")]
+        try:
+            import pyarrow  # noqa: F401
+            runs.append(("projected, pyarrow engine", "main.CSV_COLUMNS", "pyarrow"))
+        except ImportError:
+            print("(pyarrow not installed, skipping the pyarrow engine)")
+        for name, columns, engine in runs:
+            elapsed, frame, peak, width = load(path, columns, engine, directory)
+            print(f"{name:>34} {elapsed:>9.2f} {frame:>11d} {peak:>14d}  ({width} columns)")
@@ -0,0 +1,48 @@
+"""
+Date parse throughput: pd.to_datetime(errors='coerce') over the whole column, as the
+ingest path did before, against parse_dates, which parses each distinct string once.
+
+Usage: python benchmarks/date_parsing.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from main import parse_dates
+
+
+def make_dates(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2020-01-01", "2024-12-31")
+    picks = rng.integers(0, len(days), rows)
+    seconds = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s")
+    return {
+        "ISO (%Y-%m-%d), 1.8k distinct": pd.Series(days.strftime("%Y-%m-%d")[picks]),
+        "day first (%d/%m/%Y), 1.8k distinct": pd.Series(days.strftime("%d/%m/%Y")[picks]),
+        "text (%d %b %Y), 1.8k distinct": pd.Series(days.strftime("%d %b %Y")[picks]),
+        "timestamps to the second, all distinct": pd.Series(seconds.strftime("%Y-%m-%d %H:%M:%S")),
+    }
+
+
+def throughput(function, values):
+    start = time.perf_counter()
+    parsed = function(values)
+    return parsed, len(values) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    print(f"{rows:,} rows, million rows parsed per second")
+    print(f"{'column':>40} {'to_datetime':>12} {'parse_dates':>12} {'speedup':>8}")
+    for name, values in make_dates(rows).items():
+        formats = {"day first (%d/%m/%Y), 1.8k distinct": "%d/%m/%Y"}
+        date_format = formats.get(name)
+        expected, before = throughput(
+            lambda v: pd.to_datetime(v, format=date_format, errors="coerce").to_numpy(dtype="datetime64[ns]"), values)
+        parsed, after = throughput(lambda v: parse_dates(v, date_format), values)
+        assert np.array_equal(expected, parsed, equal_nan=True), name
+        print(f"{name:>40} {before / 1e6:>12.2f} {after / 1e6:>12.2f} {after / before:>7.1f}x")
@@ -0,0 +1,74 @@
+"""
+Summary-only detector run: the detect_* functions, which copy every flagged row out of
+the frame, against the detect_*_mask functions wrapped in FlaggedRows, which only count.
+Reports time, peak traced memory and the memory still held by the four results.
+
+Usage: python benchmarks/detector_masks.py [rows]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from main import (
+    FlaggedRows,
+    detect_duplicate_payments,
+    detect_duplicate_payments_mask,
+    detect_round_number_abuse,
+    detect_round_number_abuse_mask,
+    detect_threshold_avoidance,
+    detect_threshold_avoidance_mask,
+    detect_unusual_timing,
+    detect_unusual_timing_mask,
+)
+from synthetic import make_transactions
+
+
+def copied(df):
+    return [
+        detect_duplicate_payments(df),
+        detect_unusual_timing(df),
+        detect_round_number_abuse(df),
+        detect_threshold_avoidance(df),
+    ]
+
+
+def masked(df):
+    return [
+        FlaggedRows(df, detect_duplicate_payments_mask(df)),
+        FlaggedRows(df, detect_unusual_timing_mask(df)),
+        FlaggedRows(df, detect_round_number_abuse_mask(df)),
+        FlaggedRows(df, detect_threshold_avoidance_mask(df)),
+    ]
+
+
+def measure(function, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = function(df)
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return [len(result) for result in results], elapsed, peak / 2 ** 20, held / 2 ** 20
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    df = make_transactions(rows)
+    # Parse dates up front so both runs do the same work in detect_unusual_timing
+    df["date"] = pd.to_datetime(df["date"])
+    print(f"{rows:,} transactions, {len(df.columns)} columns")
+
+    mask_counts, mask_time, mask_peak, mask_held = measure(masked, df)
+    copy_counts, copy_time, copy_peak, copy_held = measure(copied, df)
+    assert mask_counts == copy_counts
+
+    print(f"detect_* (copies):    {copy_time:6.2f}s  peak {copy_peak:7.1f} MB  held {copy_held:7.1f} MB")
+    print(f"detect_*_mask (lazy): {mask_time:6.2f}s  peak {mask_peak:7.1f} MB  held {mask_held:7.1f} MB")
+    print("flagged:", copy_counts)
@@ -0,0 +1,45 @@
+"""
+Wall time of detect_fuzzy_duplicates with the thefuzz and rapidfuzz scoring backends.
+
+Usage: python benchmarks/fuzzy_backends.py [sizes...]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import detect_fuzzy_duplicates
+from synthetic import make_vendor_frame
+
+THRESHOLD = 90
+# Pair-at-a-time thefuzz scoring without blocking is not timed beyond this many vendors
+MAX_THEFUZZ_UNBLOCKED = 10_000
+
+
+def timed(df, **kwargs):
+    start = time.perf_counter()
+    result = detect_fuzzy_duplicates(df, THRESHOLD, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(size):
+    df = make_vendor_frame(size)
+    for blocking in (None, "ngram"):
+        reference = None
+        for backend in ("thefuzz", "rapidfuzz"):
+            if backend == "thefuzz" and blocking is None and size > MAX_THEFUZZ_UNBLOCKED:
+                print(f"{size:>8} {str(blocking):>8} {backend:>10} {'skipped':>10}")
+                continue
+            result, elapsed = timed(df, blocking=blocking, backend=backend)
+            if reference is None:
+                reference = result
+            assert result.equals(reference), "backends disagree"
+            print(f"{size:>8} {str(blocking):>8} {backend:>10} {elapsed:>10.2f} {len(result):>8}")
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'vendors':>8} {'blocking':>8} {'backend':>10} {'time (s)':>10} {'matches':>8}")
+    for size in sizes:
+        run(size)
@@ -0,0 +1,48 @@
+"""
+Pair counts and wall time for detect_fuzzy_duplicates: every pair, pairs left
+after length-bound pruning, and pairs sharing an n-gram block.
+
+Usage: python benchmarks/fuzzy_blocking.py [sizes...]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import _blocked_candidate_pairs, _length_order, detect_fuzzy_duplicates, FUZZY_NGRAM_SIZE
+from synthetic import make_vendor_frame
+
+THRESHOLD = 90
+# Scoring every length-compatible pair beyond this many vendors takes too long to be worth timing
+MAX_PRUNED = 10_000
+
+
+def run(size):
+    df = make_vendor_frame(size)
+    names = [str(v) for v in df['vendor'].unique()]
+    all_pairs = size * (size - 1) // 2
+    pruned_pairs = sum(stop - a - 1 for a, stop in enumerate(_length_order(names, THRESHOLD)[1]))
+    blocked_pairs = sum(len(partners) for _, partners in _blocked_candidate_pairs(names, THRESHOLD, FUZZY_NGRAM_SIZE))
+
+    start = time.perf_counter()
+    blocked = detect_fuzzy_duplicates(df, THRESHOLD, blocking="ngram")
+    blocked_time = time.perf_counter() - start
+
+    pruned_time = float('nan')
+    if size <= MAX_PRUNED:
+        start = time.perf_counter()
+        pruned = detect_fuzzy_duplicates(df, THRESHOLD, blocking=None)
+        pruned_time = time.perf_counter() - start
+        assert pruned.equals(blocked), "blocked matches differ from length-pruned matches"
+
+    print(f"{size:>8} {all_pairs:>14,} {pruned_pairs:>14,} {blocked_pairs:>14,} "
+          f"{pruned_time:>11.2f} {blocked_time:>12.2f} {len(blocked):>8}")
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'vendors':>8} {'all pairs':>14} {'length pairs':>14} {'blocked pairs':>14} "
+          f"{'length (s)':>11} {'blocked (s)':>12} {'matches':>8}")
+    for size in sizes:
+        run(size)
@@ -0,0 +1,57 @@
+"""
+Recall and speed of the approximate MinHash/LSH mode of detect_fuzzy_duplicates
+against exact matching, for several band/row settings.
+
+Usage: python benchmarks/fuzzy_minhash.py [vendors] [large vendors] [bands] [rows]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import _minhash_candidate_pairs, detect_fuzzy_duplicates, FUZZY_MINHASH_BANDS, FUZZY_MINHASH_ROWS, FUZZY_NGRAM_SIZE
+from synthetic import make_vendor_frame
+
+THRESHOLD = 90
+SETTINGS = [(16, 8), (32, 6), (32, 4), (64, 4), (32, 3), (64, 3)]
+
+
+def pairs(result):
+    return set(zip(result['Vendor 1'], result['Vendor 2']))
+
+
+def recall_report(size):
+    df = make_vendor_frame(size)
+    names = [str(v) for v in df['vendor'].unique()]
+    start = time.perf_counter()
+    exact = detect_fuzzy_duplicates(df, THRESHOLD, blocking=None, backend="rapidfuzz")
+    exact_time = time.perf_counter() - start
+
+    print(f"{size} vendors, exact: {len(exact)} matches in {exact_time:.2f}s (rapidfuzz, length-pruned)")
+    print(f"{'bands':>6} {'rows':>5} {'candidates':>12} {'time (s)':>9} {'matches':>8} {'recall':>7}")
+    for bands, rows in SETTINGS:
+        candidates = sum(len(p) for _, p in _minhash_candidate_pairs(names, FUZZY_NGRAM_SIZE, bands, rows))
+        start = time.perf_counter()
+        approx = detect_fuzzy_duplicates(df, THRESHOLD, blocking="minhash", backend="rapidfuzz",
+                                         minhash_bands=bands, minhash_rows=rows)
+        elapsed = time.perf_counter() - start
+        found = pairs(approx)
+        assert found <= pairs(exact), "approximate mode reported a pair below the threshold"
+        print(f"{bands:>6} {rows:>5} {candidates:>12,} {elapsed:>9.2f} {len(found):>8} {len(found) / max(len(exact), 1):>7.3f}")
+
+
+def large_run(size, bands, rows):
+    df = make_vendor_frame(size)
+    start = time.perf_counter()
+    approx = detect_fuzzy_duplicates(df, THRESHOLD, blocking="minhash", backend="rapidfuzz",
+                                     minhash_bands=bands, minhash_rows=rows)
+    print(f"\n{size} vendors, {bands} bands x {rows} rows: {len(approx)} matches in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    recall_report(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
+    if len(sys.argv) > 2:
+        bands = int(sys.argv[3]) if len(sys.argv) > 3 else FUZZY_MINHASH_BANDS
+        rows = int(sys.argv[4]) if len(sys.argv) > 4 else FUZZY_MINHASH_ROWS
+        large_run(int(sys.argv[2]), bands, rows)
@@ -0,0 +1,34 @@
+"""
+Scaling of sharded detect_fuzzy_duplicates from 1 to N processes.
+
+Usage: python benchmarks/fuzzy_processes.py [vendors] [max processes]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import detect_fuzzy_duplicates
+from synthetic import make_vendor_frame
+
+THRESHOLD = 90
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    df = make_vendor_frame(size)
+
+    print(f"{size} vendors, {os.cpu_count()} CPUs")
+    print(f"{'backend':>10} {'processes':>10} {'time (s)':>10} {'speedup':>8} {'matches':>8}")
+    for backend in ("thefuzz", "rapidfuzz"):
+        baseline = reference = None
+        for processes in range(1, max_processes + 1):
+            start = time.perf_counter()
+            result = detect_fuzzy_duplicates(df, THRESHOLD, blocking=None, backend=backend, processes=processes)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                baseline, reference = elapsed, result
+            assert result.equals(reference), "sharded matches differ from single-process matches"
+            print(f"{backend:>10} {processes:>10} {elapsed:>10.2f} {baseline / elapsed:>8.2f} {len(result):>8}")
@@ -0,0 +1,48 @@
+"""
+Loading a directory of many small ledger exports: one load_transactions call per file
+followed by pd.concat, as callers had to do before, against a single directory load
+with 1, 2 and 4 parsing threads. The pandas C parser releases the GIL while
+tokenizing, so threads help once there are cores to run them on.
+
+Usage: python benchmarks/multi_file_ingest.py [files] [rows per file]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from synthetic import make_transactions
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import load_transactions
+
+
+def per_file(paths):
+    frames = [load_transactions(path) for path in paths]
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"{files} files x {rows} rows, {os.cpu_count()} CPUs")
+    print(f"{'method':>18} {'time (s)':>9} {'files/s':>8} {'rows/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        df = make_transactions(files * rows)
+        paths = [os.path.join(directory, f"ledger_{i:05d}.csv") for i in range(files)]
+        for i, path in enumerate(paths):
+            df.iloc[i * rows:(i + 1) * rows].to_csv(path, index=False)
+        methods = [("per-file loop", lambda: per_file(paths))]
+        methods += [(f"directory, {n} thr", lambda n=n: load_transactions(directory, workers=n)) for n in (1, 2, 4)]
+        for name, run in methods:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+            assert len(result) == files * rows
+            print(f"{name:>18} {elapsed:9.2f} {files / elapsed:8.0f} {len(result) / elapsed:10.0f}")
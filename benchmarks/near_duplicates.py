@@ -0,0 +1,67 @@
+"""
+Near-duplicate payments (same vendor and amount within a few days): a self-join on
+vendor and amount filtered by date distance, against the sort-and-sweep detector.
+The self-join's output grows with the square of each vendor/amount group, so it is
+only run up to the size given as its limit.
+
+Usage: python benchmarks/near_duplicates.py [window days] [self-join limit] [rows ...]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import _near_duplicate_mask
+
+
+def make_payments(rows, vendors=50_000, seed=0):
+    """
+    Typed payments over two years: recurring amounts per vendor, so exact repeats are common.
+    """
+    rng = np.random.default_rng(seed)
+    vendor = rng.integers(0, vendors, rows)
+    # Each vendor bills from a small set of amounts, as subscriptions and retainers do
+    amount = np.round((vendor % 997 + 1) * 10.0 + rng.integers(0, 20, rows) * 25.0, 2)
+    return pd.DataFrame({
+        "date": np.datetime64("2024-01-01", "ns") + rng.integers(0, 730, rows).astype("timedelta64[D]"),
+        "amount": amount,
+        "vendor": pd.Categorical.from_codes(vendor, [f"Vendor {i}" for i in range(vendors)]),
+    })
+
+
+def self_join(df, window_days):
+    pairs = df.reset_index().merge(df.reset_index(), on=["vendor", "amount"], suffixes=("", "_other"))
+    pairs = pairs[(pairs["index"] != pairs["index_other"])
+                  & ((pairs["date"] - pairs["date_other"]).abs() <= pd.Timedelta(days=window_days))]
+    mask = np.zeros(len(df), dtype=bool)
+    mask[pairs["index"].to_numpy()] = True
+    return mask
+
+
+if __name__ == "__main__":
+    window = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+    sizes = [int(size) for size in sys.argv[3:]] or [1_000_000, 2_000_000, 10_000_000]
+    print(f"window +/-{window} days")
+    print(f"{'rows':>10} {'self-join (s)':>14} {'sweep (s)':>10} {'sweep, 1.00 tol (s)':>20} {'flagged':>9}")
+    for rows in sizes:
+        df = make_payments(rows)
+        start = time.perf_counter()
+        mask = _near_duplicate_mask(df, window)
+        sweep = time.perf_counter() - start
+        start = time.perf_counter()
+        _near_duplicate_mask(df, window, amount_tolerance=1.0)
+        tolerant = time.perf_counter() - start
+        joined = "skipped"
+        if rows <= limit:
+            start = time.perf_counter()
+            expected = self_join(df, window)
+            joined = f"{time.perf_counter() - start:.2f}"
+            assert np.array_equal(mask, expected)
+        print(f"{rows:>10} {joined:>14} {sweep:10.2f} {tolerant:20.2f} {int(mask.sum()):>9}")
@@ -0,0 +1,76 @@
+"""
+Lookup rate of PaymentHistory.contains with and without the Bloom filter in front of
+the SQLite key table, for a probe batch where few keys were paid before, as in a normal
+new batch. Also reports the filter's size, measured false positive rate and the time to
+rebuild it from the table.
+
+Usage: python benchmarks/payment_filter.py [history keys] [probe keys] [present fraction]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import PaymentHistory
+
+
+class PassAll:
+    """
+    Stand-in filter that sends every key to SQLite, i.e. the history without a filter.
+    """
+
+    def contains(self, keys):
+        return np.ones(len(keys), dtype=bool)
+
+
+def rate(function, keys, repeat=3):
+    best = min(timed(function, keys) for _ in range(repeat))
+    return len(keys) / best
+
+
+def timed(function, keys):
+    start = time.perf_counter()
+    function(keys)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    probes = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    present = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    rng = np.random.default_rng(0)
+    stored = rng.integers(0, 2 ** 64, size, dtype=np.uint64)
+    probe = rng.integers(0, 2 ** 64, probes, dtype=np.uint64)
+    hits = rng.choice(probes, int(probes * present), replace=False)
+    probe[hits] = rng.choice(stored, len(hits), replace=False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = PaymentHistory(os.path.join(directory, "history.db"), capacity=size)
+        for start in range(0, size, 1_000_000):
+            history.add(stored[start:start + 1_000_000])
+        bloom = history.bloom
+        expected = history.contains(probe)
+        assert expected.sum() == len(hits)
+
+        absent = probe[~expected]
+        measured = bloom.contains(absent).mean()
+        start = time.perf_counter()
+        history.rebuild_filter(capacity=size)
+        rebuild = time.perf_counter() - start
+
+        print(f"{size} stored keys, {probes} probes, {present:.0%} present")
+        print(f"filter: {bloom.size // 8 / 2 ** 20:.0f} MB, {bloom.hashes} hashes, "
+              f"false positives {measured:.4%} (target {bloom.false_positive_rate:.0%}), rebuild {rebuild:.2f}s")
+        print(f"{'lookup':>20} {'keys/s':>12}")
+        print(f"{'filter only':>20} {rate(history.bloom.contains, probe):12,.0f}")
+        print(f"{'filter + SQLite':>20} {rate(history.contains, probe):12,.0f}")
+        history.bloom = PassAll()
+        assert np.array_equal(history.contains(probe), expected)
+        print(f"{'SQLite only':>20} {rate(history.contains, probe):12,.0f}")
+        history.close()
@@ -0,0 +1,65 @@
+"""
+Checking a new batch of payments against all earlier ones: concatenating the history
+frame with the batch and calling duplicated(), against PaymentHistory's on-disk key
+index. The concat grows with the history; the index lookup only with the batch.
+
+Usage: python benchmarks/payment_history.py [batch rows] [history rows ...]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_transactions
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import PaymentHistory, _duplicate_keys, prepare_transactions
+
+
+def concat_duplicates(history, batch):
+    combined = pd.concat([history, batch], ignore_index=True)
+    return combined.duplicated(subset=['date', 'amount', 'vendor'], keep=False).to_numpy()[len(history):]
+
+
+if __name__ == "__main__":
+    batch_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sizes = [int(size) for size in sys.argv[2:]] or [1_000_000, 5_000_000]
+    print(f"batch of {batch_rows} payments, 1% of them paid before")
+    print(f"{'history':>10} {'concat (s)':>11} {'index (s)':>10} {'record (s)':>11} {'index MB':>9} {'flagged':>8}")
+    for size in sizes:
+        history = prepare_transactions(make_transactions(size, vendors=20_000, duplicate_rate=0, seed=1))
+        batch = prepare_transactions(make_transactions(batch_rows, vendors=20_000, duplicate_rate=0, seed=2))
+        # Re-paid invoices: rows copied over from the history
+        repaid = np.random.default_rng(3).choice(size, batch_rows // 100, replace=False)
+        batch.iloc[:len(repaid), :] = history.iloc[repaid].to_numpy()
+        batch = prepare_transactions(batch)
+
+        start = time.perf_counter()
+        expected = concat_duplicates(history, batch)
+        concat = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.db")
+            index = PaymentHistory(path)
+            for offset in range(0, size, 1_000_000):
+                index.add(history.iloc[offset:offset + 1_000_000])
+            start = time.perf_counter()
+            keys = _duplicate_keys(batch)
+            found = index.contains(keys)
+            lookup = time.perf_counter() - start
+            start = time.perf_counter()
+            index.add(keys)
+            record = time.perf_counter() - start
+            index.close()
+            megabytes = os.path.getsize(path) / 2 ** 20
+
+        # The concat also flags repeats within the batch, which the index leaves to duplicated()
+        within = batch.duplicated(subset=['date', 'amount', 'vendor'], keep=False).to_numpy()
+        assert np.array_equal(found | within, expected)
+        print(f"{size:>10} {concat:11.2f} {lookup:10.2f} {record:11.2f} {megabytes:9.0f} {int(found.sum()):>8}")
@@ -0,0 +1,58 @@
+"""
+Split-transaction detection per vendor over a rolling window of days: pandas'
+groupby().rolling() over a date index, which only yields each window's sum and count,
+against the sort and searchsorted sweep, which also flags every part of each window.
+
+Usage: python benchmarks/split_transactions.py [window days] [rows ...]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import THRESHOLD_AMOUNT, detect_split_transactions_mask
+
+
+def make_payments(rows, vendors=50_000, approvers=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": np.datetime64("2024-01-01", "ns") + rng.integers(0, 730, rows).astype("timedelta64[D]"),
+        "amount": np.round(rng.lognormal(7, 1.2, rows), 2),
+        "vendor": pd.Categorical.from_codes(rng.integers(0, vendors, rows), [f"Vendor {i}" for i in range(vendors)]),
+        "approved_by": pd.Categorical.from_codes(rng.integers(0, approvers, rows), [f"Approver {i}" for i in range(approvers)]),
+    })
+
+
+def rolling_windows(df, window_days, threshold):
+    """
+    Window-end rows whose trailing window of sub-threshold parts reaches the threshold.
+    """
+    parts = df[(df["amount"] > 0) & (df["amount"] < threshold)].sort_values(["vendor", "date"])
+    rolled = parts.set_index("date").groupby("vendor", observed=True)["amount"].rolling(f"{window_days + 1}D")
+    sums, counts = rolled.sum(), rolled.count()
+    return int(((sums >= threshold) & (counts >= 2)).sum())
+
+
+if __name__ == "__main__":
+    window = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    sizes = [int(size) for size in sys.argv[2:]] or [1_000_000, 10_000_000]
+    print(f"window {window} days, threshold {THRESHOLD_AMOUNT}")
+    print(f"{'rows':>10} {'rolling (s)':>12} {'sweep (s)':>10} {'sweep, +approver (s)':>21} {'flagged':>9}")
+    for rows in sizes:
+        df = make_payments(rows)
+        start = time.perf_counter()
+        rolling_windows(df, window, THRESHOLD_AMOUNT)
+        rolling = time.perf_counter() - start
+        start = time.perf_counter()
+        mask = detect_split_transactions_mask(df, THRESHOLD_AMOUNT, window, by=["vendor"])
+        sweep = time.perf_counter() - start
+        start = time.perf_counter()
+        detect_split_transactions_mask(df, THRESHOLD_AMOUNT, window, by=["vendor", "approved_by"])
+        both = time.perf_counter() - start
+        print(f"{rows:>10} {rolling:12.2f} {sweep:10.2f} {both:21.2f} {int(mask.sum()):>9}")
@@ -0,0 +1,55 @@
+"""
+CLI pipeline on a large CSV: main() loading the whole file against main() in
+streaming mode. Each run happens in a fresh process so peak RSS can be compared;
+both must write the same risk_summary.csv.
+
+Usage: python benchmarks/streaming_ingest.py [rows] [chunk size]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from synthetic import make_transactions
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+RUN = """
+import sys, time
+sys.path.append({api!r})
+import main
+start = time.perf_counter()
+main.main({path!r}, chunk_size={chunk_size!r})
+elapsed = time.perf_counter() - start
+# VmHWM, unlike ru_maxrss, is not inherited from the benchmark process across exec
+peak = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(f"RESULT {{elapsed:.2f}} {{int(peak) // 1024}}")
+"""
+
+
+def run(path, chunk_size, directory):
+    output = subprocess.run(
+        [sys.executable, "-c", RUN.format(api=API, path=path, chunk_size=chunk_size)],
+        cwd=directory, capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, peak = output.split("RESULT ")[1].split()
+    with open(os.path.join(directory, "outputs", "risk_summary.csv")) as summary:
+        return float(elapsed), int(peak), summary.read()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 250_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ledger.csv")
+        make_transactions(rows).to_csv(path, index=False)
+        print(f"{rows:,} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB CSV")
+
+        memory_time, memory_peak, memory_summary = run(path, None, directory)
+        stream_time, stream_peak, stream_summary = run(path, chunk_size, directory)
+        assert memory_summary == stream_summary, (memory_summary, stream_summary)
+
+        print(f"in memory: {memory_time:6.2f}s  peak RSS {memory_peak:6d} MB")
+        print(f"streamed:  {stream_time:6.2f}s  peak RSS {stream_peak:6d} MB ({chunk_size:,}-row chunks)")
+        print(memory_summary)
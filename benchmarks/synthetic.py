@@ -0,0 +1,112 @@
+"""
+Synthetic ledger data for the benchmark scripts.
+"""
+import numpy as np
+import pandas as pd
+
+SYLLABLES = [
+    "ac", "al", "an", "ar", "ba", "be", "bro", "ca", "cor", "da", "del", "en", "er", "fa", "gra", "ha",
+    "in", "ka", "la", "lin", "ma", "mer", "na", "nor", "o", "pa", "per", "qui", "ra", "ri", "sa", "son",
+    "sta", "ta", "ter", "u", "va", "ver", "wa", "wes", "xa", "yo", "za", "zen",
+]
+TRADES = [
+    "Supplies", "Consulting", "Logistics", "Services", "Holdings", "Engineering", "Systems", "Solutions",
+    "Partners", "Trading", "Electric", "Construction", "Catering", "Security", "Printing", "Software",
+]
+SUFFIXES = ["Ltd", "Inc", "LLC", "Corp", "Pty Ltd", "Group", "& Co", ""]
+
+
+def _typo(rng, name):
+    """
+    Apply one keyboard-style edit so the result is a near-duplicate of the input.
+    """
+    k = int(rng.integers(0, len(name)))
+    edit = rng.integers(0, 3)
+    if edit == 0:
+        return name[:k] + name[k + 1:]
+    if edit == 1:
+        return name[:k] + chr(int(rng.integers(97, 123))) + name[k:]
+    return name[:k] + chr(int(rng.integers(97, 123))) + name[k + 1:]
+
+
+def _make_words(rng, count):
+    """
+    Pronounceable pseudo-words standing in for the proper nouns in real vendor names.
+    """
+    words = set()
+    while len(words) < count:
+        syllables = [SYLLABLES[int(rng.integers(0, len(SYLLABLES)))] for _ in range(int(rng.integers(2, 5)))]
+        words.add("".join(syllables).capitalize())
+    return sorted(words)
+
+
+def make_vendor_names(n, duplicate_rate=0.05, seed=0):
+    """
+    Unique company-style vendor names, a share of which are typo variants of others.
+    """
+    rng = np.random.default_rng(seed)
+    # Distinct proper nouns grow with the size of a real vendor master
+    words = _make_words(rng, max(5_000, n // 2))
+    names = []
+    seen = set()
+    while len(names) < n:
+        if names and rng.random() < duplicate_rate:
+            name = _typo(rng, names[int(rng.integers(0, len(names)))])
+        else:
+            parts = [words[int(rng.integers(0, len(words)))] for _ in range(int(rng.integers(1, 3)))]
+            parts.append(TRADES[int(rng.integers(0, len(TRADES)))])
+            parts.append(SUFFIXES[int(rng.integers(0, len(SUFFIXES)))])
+            name = " ".join(p for p in parts if p)
+        if name and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def make_vendor_frame(n, duplicate_rate=0.05, seed=0):
+    """
+    A minimal transaction frame with one row per synthetic vendor.
+    """
+    return pd.DataFrame({"vendor": make_vendor_names(n, duplicate_rate, seed)})
+
+
+ACCOUNTS = ["Capex", "Professional Fees", "Operating Expenses", "Travel", "Marketing", "Facilities", "IT", "Payroll"]
+DESCRIPTIONS = [
+    "Office Equipment Purchase", "Consulting Fees", "Software Subscription", "Travel Reimbursement",
+    "Facilities Maintenance", "Marketing Services", "Hardware Purchase", "Legal Fees",
+]
+APPROVERS = ["MJONES", "SBROWN", "AKHAN", "LCHEN", "RPATEL", "TNGUYEN", ""]
+
+
+def make_transactions(rows, vendors=2_000, duplicate_rate=0.01, seed=0):
+    """
+    A transaction frame shaped like data/sample_transactions.csv, with date strings as
+    loaded from CSV. Amounts are log-uniform with a share of round thousands and of
+    amounts just under the 10,000 threshold; duplicate_rate of the rows repeat the date,
+    amount and vendor of an earlier row.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array(make_vendor_names(vendors, seed=seed), dtype=object)
+    dates = np.array(pd.date_range("2022-01-01", "2024-12-31").strftime("%Y-%m-%d"), dtype=object)
+
+    amounts = np.round(10 ** rng.uniform(1, 5.3, rows), 2)
+    kind = rng.random(rows)
+    amounts[kind < 0.05] = rng.integers(1, 50, int((kind < 0.05).sum())) * 1000.0
+    near = (kind >= 0.05) & (kind < 0.07)
+    amounts[near] = np.round(rng.uniform(9000, 10000, int(near.sum())), 2)
+
+    date = dates[rng.integers(0, len(dates), rows)]
+    vendor = names[rng.integers(0, len(names), rows)]
+    copies = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    sources = rng.integers(0, np.maximum(copies, 1))
+    date[copies], amounts[copies], vendor[copies] = date[sources], amounts[sources], vendor[sources]
+
+    return pd.DataFrame({
+        "transaction_id": [f"TXN{i:08d}" for i in range(1, rows + 1)],
+        "date": date,
+        "amount": amounts,
+        "description": np.array(DESCRIPTIONS, dtype=object)[rng.integers(0, len(DESCRIPTIONS), rows)],
+        "vendor": vendor,
+        "account": np.array(ACCOUNTS, dtype=object)[rng.integers(0, len(ACCOUNTS), rows)],
+        "approved_by": np.array(APPROVERS, dtype=object)[rng.integers(0, len(APPROVERS), rows)],
+    })
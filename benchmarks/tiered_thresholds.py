@@ -0,0 +1,89 @@
+"""
+Tiered approval limits that differ by approver and account: selecting each rule's rows
+and calling detect_threshold_avoidance_mask once per tier, against the single
+searchsorted pass over every rule's tiers that detect_threshold_avoidance does with a
+limit table.
+
+Usage: python benchmarks/tiered_thresholds.py [rows ...]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import THRESHOLD_AMOUNT, detect_threshold_avoidance_mask, _threshold_tiers
+
+TIERS = [5000, 10000, 50000, 250000]
+
+
+def make_payments(rows, approvers=200, accounts=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "amount": np.round(rng.lognormal(8.5, 1.5, rows), 2),
+        "approved_by": pd.Categorical.from_codes(rng.integers(0, approvers, rows), [f"Approver {i}" for i in range(approvers)]),
+        "account": pd.Categorical.from_codes(rng.integers(0, accounts, rows), [str(6000 + i) for i in range(accounts)]),
+    })
+
+
+def make_limits(approvers=200, accounts=50, seed=0):
+    """
+    Tier tables for a fifth of the approvers, a fifth of the accounts and a few pairs,
+    each scaling the standard tiers, plus the standard tiers for everyone else.
+    """
+    rng = np.random.default_rng(seed)
+    limits = [{"limit": limit} for limit in TIERS]
+    for i in rng.choice(approvers, approvers // 5, replace=False):
+        limits += [{"approved_by": f"Approver {i}", "limit": limit * rng.choice([0.5, 2])} for limit in TIERS]
+    for i in rng.choice(accounts, accounts // 5, replace=False):
+        limits += [{"account": str(6000 + i), "limit": limit * rng.choice([0.5, 2])} for limit in TIERS]
+    for i, j in zip(rng.choice(approvers, 10), rng.choice(accounts, 10)):
+        limits += [{"approved_by": f"Approver {i}", "account": str(6000 + j), "limit": limit * 4} for limit in TIERS]
+    return limits
+
+
+def per_tier(df, limits):
+    """
+    Most specific rule first: each rule's unclaimed rows, one threshold call per tier.
+    """
+    table = pd.DataFrame(limits, columns=["approved_by", "account", "limit"])
+    specificity = table["approved_by"].notna().astype(int) * 2 + table["account"].notna()
+    tiers = np.full(len(df), np.nan)
+    claimed = np.zeros(len(df), dtype=bool)
+    for (approver, account), rule in sorted(table.groupby(["approved_by", "account"], dropna=False),
+                                            key=lambda item: -specificity[item[1].index[0]]):
+        rows = ~claimed
+        if pd.notna(approver):
+            rows &= (df["approved_by"] == approver).to_numpy()
+        if pd.notna(account):
+            rows &= (df["account"] == account).to_numpy()
+        claimed |= rows
+        subset = df[rows]
+        positions = np.flatnonzero(rows)
+        for limit in rule["limit"]:
+            flagged = detect_threshold_avoidance_mask(subset, limit, None, None)
+            tiers[positions[flagged]] = limit
+    return tiers
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [1_000_000, 10_000_000]
+    limits = make_limits()
+    rules = len(pd.DataFrame(limits).drop_duplicates(["approved_by", "account"]))
+    print(f"{len(limits)} tiers in {rules} rules")
+    print(f"{'rows':>10} {'per tier (s)':>13} {'searchsorted (s)':>17} {'flagged':>9}")
+    for rows in sizes:
+        df = make_payments(rows)
+        start = time.perf_counter()
+        expected = per_tier(df, limits)
+        looped = time.perf_counter() - start
+        start = time.perf_counter()
+        tiers = _threshold_tiers(df, THRESHOLD_AMOUNT, limits)
+        single = time.perf_counter() - start
+        assert np.array_equal(tiers, expected, equal_nan=True)
+        print(f"{rows:>10} {looped:13.2f} {single:17.2f} {int((~np.isnan(tiers)).sum()):>9}")
@@ -7,6 +7,7 @@ import numpy as np
 # Ensure we can import from the scripts directory
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
 from main import (
+    prepare_transactions,
     detect_duplicate_payments,
     detect_unusual_timing,
     detect_round_number_abuse,
@@ -71,7 +72,8 @@ def detect_columns(columns):
 
 def load_and_map_data(file):
     try:
-        df = pd.read_csv(file)
+        # Preview only: the mapping needs the headers and the inspector shows 10 rows
+        df = pd.read_csv(file, nrows=10)
         if df.empty:
             st.error("The uploaded CSV is empty.")
             return None, None
@@ -91,19 +93,24 @@ def load_and_map_data(file):
                                         index=list(df.columns).index(auto_map["vendor"]) if auto_map["vendor"] in df.columns else (2 if len(df.columns) > 2 else 0),
                                         on_change=reset_analysis)
         
+        # Read only the mapped columns of the full file, with the payee as a categorical
+        usecols = list(dict.fromkeys([date_col, amount_col, vendor_col] + (["transaction_id"] if "transaction_id" in df.columns else [])))
+        if hasattr(file, "seek"):
+            file.seek(0)
+        data = pd.read_csv(file, usecols=usecols, dtype={vendor_col: "category"} if vendor_col not in (date_col, amount_col) else None)
+        
         # Critical: Transform for internal logic
-        df_mapped = df[[date_col, amount_col, vendor_col]].copy()
+        df_mapped = data[[date_col, amount_col, vendor_col]].copy()
         df_mapped.columns = ['date', 'amount', 'vendor']
         
         # Add original transaction_id if it exists, else create one
-        if "transaction_id" in df.columns:
-            df_mapped['transaction_id'] = df["transaction_id"]
+        if "transaction_id" in data.columns:
+            df_mapped['transaction_id'] = data["transaction_id"]
         else:
             df_mapped['transaction_id'] = [f"TXN_{i+1}" for i in range(len(df_mapped))]
         
-        # Casting
-        df_mapped['date'] = pd.to_datetime(df_mapped['date'], errors='coerce')
-        df_mapped['amount'] = pd.to_numeric(df_mapped['amount'], errors='coerce')
+        # Casting - parsed once here, the detectors below only read the typed columns
+        df_mapped = prepare_transactions(df_mapped)
         
         # Validation
         if df_mapped['date'].isna().any():
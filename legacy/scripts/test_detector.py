@@ -1,11 +1,19 @@
 import unittest
 import pandas as pd
+import numpy as np
 import os
 import sys
+import gzip
+import tempfile
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
 # Ensure we can import from the scripts directory if run from root
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from main import detect_duplicate_payments, detect_unusual_timing, detect_round_number_abuse, detect_threshold_avoidance
+from main import detect_duplicate_payments, detect_unusual_timing, detect_round_number_abuse, detect_threshold_avoidance, detect_duplicate_payments_mask, detect_unusual_timing_mask, detect_round_number_abuse_mask, detect_threshold_avoidance_mask, detect_split_transactions, FlaggedRows, PaymentHistory, KeyBloomFilter, prepare_transactions, parse_dates, iter_transactions, StreamingDetectors, load_transactions, export_flagged_rows, generate_risk_summary, detect_fuzzy_duplicates, VendorSimilarityCache, VendorIndex, analyze_benford, analyze_benford_tests, analyze_benford_groups, BenfordAccumulator, run_detectors
 
 class TestAnomalyDetection(unittest.TestCase):
 
@@ -37,6 +45,35 @@ class TestAnomalyDetection(unittest.TestCase):
         unusual = detect_unusual_timing(self.df)
         self.assertEqual(len(unusual), 2)  # 2025-12-06 and 2025-12-07 are Sat/Sun
 
+    def test_unusual_timing_does_not_modify_input(self):
+        raw = pd.DataFrame({"date": ["2025-12-06", "2025-12-08", "not a date"], "amount": ["10", "x", "5.5"], "vendor": ["A", "B", "C"]})
+        typed = prepare_transactions(raw)
+        self.assertEqual(str(typed["date"].dtype), "datetime64[ns]")
+        self.assertEqual(typed["amount"].isna().tolist(), [False, True, False])
+        self.assertEqual(raw["date"].tolist(), ["2025-12-06", "2025-12-08", "not a date"])
+        unusual = detect_unusual_timing(typed)
+        self.assertEqual(unusual.index.tolist(), [0])
+        self.assertIs(prepare_transactions(typed)["date"].dtype, typed["date"].dtype)
+
+    def test_unusual_timing_timezone_aware_dates(self):
+        # Friday 22:00 and Sunday 20:00 in New York are Saturday and Monday in UTC
+        raw = pd.DataFrame({"date": ["2024-01-05T22:00-05:00", "2024-01-07T20:00-05:00"], "amount": [10, 20], "vendor": ["A", "B"]})
+        aware = raw.assign(date=pd.to_datetime(raw["date"]))
+        typed = prepare_transactions(aware)
+        self.assertEqual(typed["date"].dtype, aware["date"].dtype)
+        for df in (raw, aware, typed):
+            self.assertEqual(detect_unusual_timing(df).index.tolist(), [1])
+            self.assertEqual(run_detectors(df)["indices"]["unusual_timing"].tolist(), [1])
+        self.assertEqual(pd.DatetimeIndex(parse_dates(raw["date"])).hour.tolist(), [22, 20])
+
+    def test_parse_dates_matches_to_datetime(self):
+        values = pd.Series(["2024-01-06", None, "garbage", "2024-01-06", "2024-02-30"] * 3)
+        expected = pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ns]")
+        self.assertTrue(np.array_equal(parse_dates(values), expected, equal_nan=True))
+        parsed = parse_dates(pd.Series(["05/01/2024", "06/01/2024", "31/02/2024"]), date_format="%d/%m/%Y")
+        self.assertEqual(pd.DatetimeIndex(parsed).day.tolist()[:2], [5, 6])
+        self.assertTrue(pd.isna(parsed[2]))
+
     def test_round_number_abuse(self):
         round_num = detect_round_number_abuse(self.df)
         # 1000, 10000, 5000 are multiples of 1000
@@ -47,5 +84,383 @@ class TestAnomalyDetection(unittest.TestCase):
         threshold_flagged = detect_threshold_avoidance(self.df, threshold=10000)
         self.assertEqual(len(threshold_flagged), 1)
 
+    def test_fuzzy_blocking_matches_all_pairs(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies", "ABC Supplies.", "ABC Suplies", "XYZ Consulting", "XYZ Consultng", "Vendor A", "Vendor B", "AB"]
+        })
+        for threshold in (60, 90, 95):
+            all_pairs = detect_fuzzy_duplicates(vendors, threshold=threshold, blocking=None)
+            blocked = detect_fuzzy_duplicates(vendors, threshold=threshold, blocking="ngram")
+            self.assertTrue(all_pairs.equals(blocked))
+        self.assertEqual(list(blocked.columns), ["Vendor 1", "Vendor 2", "Similarity Score"])
+
+    def test_fuzzy_length_pruning_keeps_original_pair_order(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies Ltd", "XYZ", "ABC Supplies Ltd.", "XYZ Inc", "ABC Suplies Ltd", "Q"]
+        })
+        matches = detect_fuzzy_duplicates(vendors, threshold=85, blocking=None)
+        self.assertEqual(list(zip(matches["Vendor 1"], matches["Vendor 2"], matches["Similarity Score"])), [
+            ("ABC Supplies Ltd", "ABC Supplies Ltd.", 97),
+            ("ABC Supplies Ltd", "ABC Suplies Ltd", 97),
+            ("ABC Supplies Ltd.", "ABC Suplies Ltd", 94),
+        ])
+
+    def test_fuzzy_rapidfuzz_backend_matches_thefuzz(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies Ltd", "XYZ", "ABC Supplies Ltd.", "XYZ Inc", "ABC Suplies Ltd", "Q", "XYZ Inc."]
+        })
+        expected = detect_fuzzy_duplicates(vendors, threshold=85, blocking=None, backend="thefuzz")
+        for blocking in (None, "ngram"):
+            matches = detect_fuzzy_duplicates(vendors, threshold=85, blocking=blocking, backend="rapidfuzz", chunk_size=2)
+            self.assertTrue(expected.equals(matches))
+
+    def test_fuzzy_sharded_matches_single_process(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies Ltd", "XYZ", "ABC Supplies Ltd.", "XYZ Inc", "ABC Suplies Ltd", "Q", "XYZ Inc."]
+        })
+        expected = detect_fuzzy_duplicates(vendors, threshold=85, blocking=None)
+        for blocking in (None, "ngram"):
+            matches = detect_fuzzy_duplicates(vendors, threshold=85, blocking=blocking, processes=2)
+            self.assertTrue(expected.equals(matches))
+
+    def test_fuzzy_cache_scores_only_new_names(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies Ltd", "XYZ", "ABC Supplies Ltd.", "XYZ Inc", "ABC Suplies Ltd", "Q", "XYZ Inc."]
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = VendorSimilarityCache(os.path.join(tmp, "vendors.db"), max_vendors=6)
+            first = detect_fuzzy_duplicates(vendors.iloc[:5], threshold=85, cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (0, 10))
+            self.assertTrue(first.equals(detect_fuzzy_duplicates(vendors.iloc[:5], threshold=85, cache=None)))
+
+            second = detect_fuzzy_duplicates(vendors, threshold=85, cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (10, 21))
+            self.assertTrue(second.equals(detect_fuzzy_duplicates(vendors, threshold=85, cache=None)))
+            self.assertEqual(len(cache), 6)
+            cache.close()
+
+    def test_vendor_index_query(self):
+        index = VendorIndex(["ABC Supplies Ltd", "XYZ", "XYZ Inc", "ABC Suplies Ltd"])
+        self.assertEqual(index.query("ABC Supplies Ltd.", threshold=85), [("ABC Supplies Ltd", 97), ("ABC Suplies Ltd", 94)])
+        self.assertEqual(index.query("Vendor Q", threshold=85), [])
+        self.assertEqual(index.add("XYZ Inc."), 4)
+        self.assertEqual(index.add("XYZ Inc."), 4)
+        self.assertEqual(index.query("XYZ Inc", threshold=90), [("XYZ Inc", 100), ("XYZ Inc.", 93)])
+
+    def test_fuzzy_minhash_finds_subset_of_exact_matches(self):
+        vendors = pd.DataFrame({
+            "vendor": ["ABC Supplies Ltd", "XYZ", "ABC Supplies Ltd.", "XYZ Inc", "ABC Suplies Ltd", "Q", "XYZ Inc."]
+        })
+        exact = detect_fuzzy_duplicates(vendors, threshold=85, blocking=None)
+        exact_pairs = set(zip(exact["Vendor 1"], exact["Vendor 2"]))
+        approx = detect_fuzzy_duplicates(vendors, threshold=85, blocking="minhash")
+        self.assertTrue(set(zip(approx["Vendor 1"], approx["Vendor 2"])) <= exact_pairs)
+        # Many short bands make missing a near-duplicate very unlikely
+        generous = detect_fuzzy_duplicates(vendors, threshold=85, blocking="minhash", minhash_bands=64, minhash_rows=2)
+        self.assertTrue(exact.equals(generous))
+
+    def test_benford_leading_digits(self):
+        amounts = pd.DataFrame({"amount": [0.5, 1e-05, 0.3, 1000, -2500, 99.99, 0, None]})
+        result = analyze_benford(amounts)
+        actual = result["Actual"].to_dict()
+        self.assertAlmostEqual(actual[1], 2 / 6)
+        self.assertAlmostEqual(actual[2], 1 / 6)
+        self.assertAlmostEqual(actual[3], 1 / 6)
+        self.assertAlmostEqual(actual[5], 1 / 6)
+        self.assertAlmostEqual(actual[9], 1 / 6)
+        self.assertTrue(analyze_benford(pd.DataFrame({"amount": [0.0]})).empty)
+
+    def test_benford_extended_tests(self):
+        amounts = pd.DataFrame({"amount": [0.5, 1234.56, 1299, 87.10, -45000, 7]})
+        results = analyze_benford_tests(amounts)
+        self.assertTrue(results["first_digit"]["analysis"].equals(analyze_benford(amounts)))
+        # Only amounts >= 10 take part in the second, first-two and last-two digit tests
+        self.assertEqual(results["second_digit"]["analysis"]["Actual"].to_dict()[2], 0.5)
+        self.assertEqual(results["first_two_digits"]["analysis"]["Actual"].to_dict()[12], 0.5)
+        self.assertEqual(results["last_two_digits"]["analysis"]["Actual"].to_dict()[0], 0.25)
+        self.assertEqual(results["last_two_digits"]["analysis"]["Actual"].to_dict()[34], 0.25)
+        statistics = results["first_two_digits"]["statistics"]
+        self.assertEqual((statistics["count"], statistics["degrees_of_freedom"]), (4, 89))
+        self.assertEqual(statistics["conformity"], "Nonconformity")
+        self.assertEqual(set(analyze_benford_tests(pd.DataFrame({"amount": [5.0]}))), {"first_digit"})
+
+    def test_benford_groups(self):
+        amounts = pd.DataFrame({
+            "amount": [4900, 4950, 4990, 4999, 1200, 2300, 150, 1100, 9800, 5],
+            "account": ["Opex"] * 4 + ["Capex"] * 5 + ["Travel"]
+        })
+        result = analyze_benford_groups(amounts, by="account", top_n=5, min_count=2)
+        self.assertEqual(list(result["account"]), ["Opex", "Capex"])
+        self.assertEqual(list(result["Count"]), [4, 5])
+        for account, mad in zip(result["account"], result["MAD"]):
+            analysis = analyze_benford(amounts[amounts["account"] == account])
+            self.assertAlmostEqual(mad, (analysis["Actual"] - analysis["Expected"]).abs().mean())
+        self.assertEqual(len(analyze_benford_groups(amounts, by="account", top_n=1, min_count=2)), 1)
+        self.assertTrue(analyze_benford_groups(amounts, by="vendor").empty)
+
+    def test_benford_accumulator_merges_chunks(self):
+        amounts = pd.Series([15000, 15000, 9999, 10000, 450, 0.75, 23.10, None, 0, -812, 1999.99, 3100])
+        left = BenfordAccumulator().update(amounts.iloc[:5]).update(amounts.iloc[5:8])
+        right = BenfordAccumulator().update(amounts.iloc[8:])
+        merged = left.merge(right)
+        self.assertEqual(len(merged), 10)
+        self.assertTrue(merged.analysis().equals(analyze_benford(pd.DataFrame({"amount": amounts}))))
+        whole = analyze_benford_tests(pd.DataFrame({"amount": amounts}))
+        for test, result in merged.tests().items():
+            self.assertTrue(result["analysis"].equals(whole[test]["analysis"]))
+            self.assertEqual(result["statistics"], whole[test]["statistics"])
+        self.assertTrue(BenfordAccumulator().analysis().empty)
+
+    def test_fused_detectors_match_individual_detectors(self):
+        df = pd.concat([self.df, self.df.iloc[[0]].assign(vendor=None), self.df.iloc[[0]].assign(vendor=None)], ignore_index=True)
+        df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+        results = run_detectors(df, threshold=10000)
+        # The fused engine parses dates without touching the caller's frame
+        self.assertEqual(df["date"].iloc[0], "2025-12-01")
+        detected = {
+            "duplicates": detect_duplicate_payments(df),
+            "unusual_timing": detect_unusual_timing(df),
+            "round_numbers": detect_round_number_abuse(df),
+            "threshold_flags": detect_threshold_avoidance(df, threshold=10000),
+        }
+        for name, flagged in detected.items():
+            self.assertTrue(df.iloc[results["indices"][name]].index.equals(flagged.index), name)
+            self.assertEqual(results["counts"][name], len(flagged))
+        self.assertTrue(results["benford"].analysis().equals(analyze_benford(df)))
+
+    def test_streaming_detectors_match_in_memory_run(self):
+        df = pd.DataFrame({
+            "date": ["2025-12-01", "2025-12-06", "2025-12-01", "2025-12-07", "2025-12-06", "2025-12-02", "2025-12-06"],
+            "amount": [1000, 9500, 1000, None, 9500, 5000, 9500.0],
+            "vendor": ["Vendor A", "Vendor B", "Vendor A", "Vendor C", "Vendor B", None, "Vendor B"]
+        })
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transactions.csv")
+            df.to_csv(path, index=False)
+            stream = StreamingDetectors(threshold=10000)
+            for chunk in iter_transactions(path, chunk_size=2):
+                stream.update(chunk)
+            counts = stream.counts()
+            self.assertEqual([len(chunk) for chunk in iter_transactions(path)], [len(df)])
+            results = run_detectors(prepare_transactions(df), threshold=10000)
+            self.assertEqual(counts, results["counts"])
+            self.assertEqual(counts["duplicates"], 5)
+
+            streamed_summary = os.path.join(directory, "streamed.csv")
+            memory_summary = os.path.join(directory, "memory.csv")
+            generate_risk_summary(*(counts[name] for name in results["counts"]), output_file=streamed_summary)
+            generate_risk_summary(*results["flagged"].values(), output_file=memory_summary)
+            with open(streamed_summary) as streamed, open(memory_summary) as memory:
+                self.assertEqual(streamed.read(), memory.read())
+
+    def test_near_duplicate_payments_within_window(self):
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2025-12-01", "2025-12-04", "2025-12-20", "2025-12-02", "2025-12-03", "2025-12-03"]),
+            "amount": [1000.00, 1000.00, 1000.00, 1000.01, 1000.00, 1000.00],
+            "vendor": ["Vendor A", "Vendor A", "Vendor A", "Vendor A", "Vendor B", None]
+        })
+        self.assertEqual(detect_duplicate_payments(df, history=None).index.tolist(), [])
+        self.assertEqual(detect_duplicate_payments(df, history=None, window_days=3).index.tolist(), [0, 1])
+        self.assertEqual(detect_duplicate_payments(df, history=None, window_days=1, amount_tolerance=0.01).index.tolist(), [0, 3])
+        results = run_detectors(df, history=None, window_days=3, amount_tolerance=0.01)
+        self.assertEqual(results["indices"]["duplicates"].tolist(), [0, 1, 3])
+        # Numeric vendor ids: the lowest id is a vendor like any other, not a missing value
+        vendor_ids = pd.DataFrame({
+            "date": pd.to_datetime(["2025-12-01", "2025-12-03", "2025-12-01", "2025-12-03"]),
+            "amount": [500.00, 500.00, 500.00, 500.00],
+            "vendor": [101, 101, 202, 202]
+        })
+        self.assertEqual(detect_duplicate_payments(vendor_ids, history=None, window_days=3).index.tolist(), [0, 1, 2, 3])
+
+    def test_tiered_threshold_limits(self):
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2025-12-01"] * 6),
+            "amount": [4800, 9500, 48000, 240000, 9500, 4700],
+            "vendor": ["Vendor A", "Vendor B", "Vendor C", "Vendor D", "Vendor E", "Vendor F"],
+            "approved_by": ["Ann", "Ann", "Ann", "Bob", "Bob", "Cal"],
+            "account": ["6100", "6100", "7200", "6100", "7200", "6100"]
+        })
+        limits = [
+            {"approved_by": "Ann", "limit": 5000}, {"approved_by": "Ann", "limit": 50000},
+            {"approved_by": "Bob", "account": "6100", "limit": 250000},
+            {"account": "6100", "limit": 5000}, {"account": "6100", "limit": 10000},
+        ]
+        # Ann's own limits win over the account's; Bob on 7200 and anyone else fall back to the threshold
+        flagged = detect_threshold_avoidance(df, limits=limits, split_window_days=None)
+        self.assertEqual(flagged.index.tolist(), [0, 2, 3, 4, 5])
+        self.assertEqual(flagged["tier"].tolist(), [5000, 50000, 250000, 10000, 5000])
+        results = run_detectors(df, limits=limits, split_window_days=None)
+        self.assertEqual(results["indices"]["threshold_flags"].tolist(), [0, 2, 3, 4, 5])
+        self.assertEqual(results["tiers"].tolist(), [5000, 50000, 250000, 10000, 5000])
+        self.assertNotIn("tier", detect_threshold_avoidance(df, limits=None, split_window_days=None).columns)
+        # Account codes match whether the config or the ledger holds them as numbers or text
+        int_limits = [{"account": 6100, "limit": 5000}]
+        self.assertEqual(detect_threshold_avoidance(df, limits=int_limits, split_window_days=None).index.tolist(), [0, 4, 5])
+        int_accounts = df.assign(account=df["account"].astype(int))
+        for rules in (int_limits, [{"account": "6100", "limit": 5000}]):
+            self.assertEqual(detect_threshold_avoidance(int_accounts, limits=rules, split_window_days=None).index.tolist(), [0, 4, 5])
+
+    def test_split_transactions(self):
+        df = pd.DataFrame({
+            "date": pd.to_datetime(["2025-12-01", "2025-12-03", "2025-12-05", "2025-12-01", "2025-12-11",
+                                    "2025-12-01", "2025-12-02", "2025-12-02"]),
+            "amount": [4000, 4000, 4000, 6000, 6000, 6000, 5000, 12000],
+            "vendor": ["Vendor A", "Vendor A", "Vendor A", "Vendor B", "Vendor B", "Vendor C", "Vendor D", "Vendor D"],
+            "approved_by": ["Ann", "Ann", "Ann", "Bob", "Bob", "Cal", "Cal", "Cal"]
+        })
+        self.assertEqual(detect_split_transactions(df, window_days=7, by=["vendor"]).index.tolist(), [0, 1, 2])
+        self.assertEqual(detect_split_transactions(df, window_days=3, by=["vendor"]).index.tolist(), [])
+        # Cal approved 6000 and 5000 to different vendors a day apart; the 12000 payment is above the limit
+        self.assertEqual(detect_split_transactions(df, window_days=7).index.tolist(), [0, 1, 2, 5, 6])
+        self.assertEqual(detect_threshold_avoidance(df, split_window_days=None).index.tolist(), [])
+        self.assertEqual(run_detectors(df, split_window_days=7)["indices"]["threshold_flags"].tolist(), [0, 1, 2, 5, 6])
+        # Numeric vendor ids: the lowest id is grouped like any other
+        vendor_ids = pd.DataFrame({
+            "date": pd.to_datetime(["2025-12-01", "2025-12-02", "2025-12-01", "2025-12-02"]),
+            "amount": [6000, 6000, 6000, 6000],
+            "vendor": [101, 101, 202, 202]
+        })
+        self.assertEqual(detect_split_transactions(vendor_ids, window_days=7, by=["vendor"]).index.tolist(), [0, 1, 2, 3])
+
+    def test_duplicates_against_payment_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.db")
+            history = PaymentHistory(path)
+            history.add(self.df.iloc[:2])
+            history.add(self.df.iloc[:1])
+            self.assertEqual(len(history), 2)
+            history.close()
+
+            batch = pd.concat([self.df.iloc[[1]], self.df.iloc[[2]].assign(vendor="Vendor Z")], ignore_index=True)
+            self.assertEqual(detect_duplicate_payments(batch, history=path).index.tolist(), [0])
+            self.assertEqual(detect_duplicate_payments(batch, history=None).index.tolist(), [])
+            history = PaymentHistory(path)
+            self.assertEqual(run_detectors(batch, history=history)["counts"]["duplicates"], 1)
+            stream = StreamingDetectors(history=history)
+            stream.update(batch.iloc[:1]).update(batch.iloc[1:])
+            self.assertEqual(stream.duplicate_count(), 1)
+            history.close()
+
+    def test_payment_history_bloom_filter(self):
+        keys = np.random.default_rng(0).integers(0, 2 ** 63, 3000, dtype=np.uint64)
+        bloom = KeyBloomFilter(capacity=1000, false_positive_rate=0.01).add(keys[:1000])
+        self.assertTrue(bloom.contains(keys[:1000]).all())
+        self.assertLess(bloom.contains(keys[1000:]).mean(), 0.02)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.db")
+            history = PaymentHistory(path, capacity=1000)
+            history.add(keys[:1500])
+            # Past its capacity the filter is rebuilt twice as large from the table
+            self.assertEqual((history.bloom.capacity, history.bloom.count), (3000, 1500))
+            history.close()
+            history = PaymentHistory(path)
+            self.assertEqual(history.bloom.capacity, 3000)
+            self.assertEqual(history.contains(keys).tolist(), [True] * 1500 + [False] * 1500)
+            history.close()
+            # A filter older than the table is not trusted
+            stale = KeyBloomFilter(capacity=1000)
+            stale.save(path + ".bloom")
+            history = PaymentHistory(path)
+            self.assertEqual(history.contains(keys[:1500]).sum(), 1500)
+            history.close()
+
+    def test_load_transactions_projects_columns(self):
+        wide = self.df.assign(cost_center=["CC1", "CC2", "CC3", "CC4"], memo=["a", "b", "c", "d"])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "wide.csv")
+            wide.to_csv(path, index=False)
+            df = load_transactions(path)
+            self.assertEqual(list(df.columns), ["transaction_id", "date", "amount", "vendor"])
+            self.assertIsInstance(df["vendor"].dtype, pd.CategoricalDtype)
+            self.assertEqual(str(df["date"].dtype), "datetime64[ns]")
+            self.assertEqual(run_detectors(df)["counts"], run_detectors(self.df)["counts"])
+            self.assertEqual(len(load_transactions(path, columns=None).columns), 6)
+
+    def test_load_transactions_date_range(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transactions.csv")
+            self.df.to_csv(path, index=False)
+            df = load_transactions(path, date_range=("2025-12-02", "2025-12-06"))
+            self.assertEqual(df["transaction_id"].tolist(), ["TXN_T2", "TXN_T4"])
+            self.assertEqual(len(load_transactions(path, date_range=(None, "2025-12-01"))), 1)
+
+    def test_load_transactions_from_directory_and_glob(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(2):
+                self.df.iloc[2 * i:2 * i + 2].to_csv(os.path.join(directory, f"part_{i}.csv"), index=False)
+            for source in (directory, os.path.join(directory, "part_*.csv")):
+                df = load_transactions(source, workers=2)
+                self.assertEqual(df["transaction_id"].tolist(), self.df["transaction_id"].tolist())
+                self.assertEqual(df["source_file"].tolist(), ["part_0.csv", "part_0.csv", "part_1.csv", "part_1.csv"])
+                self.assertEqual(df["source_row"].tolist(), [1, 2, 1, 2])
+                self.assertIsInstance(df["vendor"].dtype, pd.CategoricalDtype)
+            df = load_transactions(directory, date_range=("2025-12-02", "2025-12-06"))
+            self.assertEqual(df["source_row"].tolist(), [2, 2])
+            chunks = list(iter_transactions(directory, chunk_size=1))
+            self.assertEqual([chunk["source_row"].iloc[0] for chunk in chunks], [1, 2, 1, 2])
+            # A file name with glob characters is read as that file
+            path = os.path.join(directory, "GL[entity1].csv")
+            self.df.to_csv(path, index=False)
+            self.assertEqual(load_transactions(path)["transaction_id"].tolist(), self.df["transaction_id"].tolist())
+            self.assertTrue(load_transactions(os.path.join(directory, "*.parquet")).empty)
+
+    def test_compressed_csv_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ("transactions.csv.gz", "transactions.zip", "export.dat")]
+            self.df.to_csv(paths[0], index=False)
+            self.df.to_csv(paths[1], index=False)
+            with open(paths[2], "wb") as f:
+                f.write(gzip.compress(self.df.to_csv(index=False).encode()))
+            for path in paths:
+                self.assertEqual(load_transactions(path)["transaction_id"].tolist(), self.df["transaction_id"].tolist(), path)
+                chunks = list(iter_transactions(path, chunk_size=3))
+                self.assertEqual([len(chunk) for chunk in chunks], [3, 1], path)
+            with open(paths[0], "rb") as f:
+                df = load_transactions(f, engine="pyarrow" if pyarrow is not None else "c")
+            self.assertEqual(df["amount"].tolist(), self.df["amount"].tolist())
+            self.assertIsInstance(df["vendor"].dtype, pd.CategoricalDtype)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_and_arrow_input_and_flagged_output(self):
+        wide = self.df.assign(memo=["a", "b", "c", "d"])
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("transactions.parquet", "transactions.arrow"):
+                path = os.path.join(directory, name)
+                if name.endswith(".parquet"):
+                    wide.to_parquet(path, index=False, row_group_size=2)
+                else:
+                    wide.to_feather(path)
+                df = load_transactions(path, date_range=("2025-12-02", "2025-12-06"))
+                self.assertEqual(list(df.columns), ["transaction_id", "date", "amount", "vendor"], name)
+                self.assertEqual(df["transaction_id"].tolist(), ["TXN_T2", "TXN_T4"], name)
+                self.assertIsInstance(df["vendor"].dtype, pd.CategoricalDtype)
+                self.assertEqual(str(df["date"].dtype), "datetime64[ns]")
+                chunks = list(iter_transactions(path, chunk_size=3))
+                self.assertEqual([len(chunk) for chunk in chunks], [3, 1], name)
+                self.assertEqual(list(chunks[0].columns), ["transaction_id", "date", "amount", "vendor"], name)
+                self.assertIsInstance(chunks[0]["vendor"].dtype, pd.CategoricalDtype)
+
+            output = os.path.join(directory, "flagged.parquet")
+            results = run_detectors(self.df, threshold=10000)
+            export_flagged_rows(results["flagged"], output)
+            flagged = pd.read_parquet(output)
+            self.assertEqual(flagged["detector"].value_counts().to_dict(), {name: n for name, n in results["counts"].items() if n})
+            self.assertEqual(len(flagged), sum(results["counts"].values()))
+
+    def test_detector_masks_and_lazy_flagged_rows(self):
+        masks = {
+            "duplicates": (detect_duplicate_payments_mask(self.df), detect_duplicate_payments(self.df)),
+            "unusual_timing": (detect_unusual_timing_mask(self.df), detect_unusual_timing(self.df)),
+            "round_numbers": (detect_round_number_abuse_mask(self.df), detect_round_number_abuse(self.df)),
+            "threshold_flags": (detect_threshold_avoidance_mask(self.df, 10000), detect_threshold_avoidance(self.df, 10000)),
+        }
+        for name, (mask, flagged) in masks.items():
+            rows = FlaggedRows(self.df, mask)
+            self.assertEqual(len(rows), len(flagged), name)
+            self.assertFalse(hasattr(rows, "_frame"))
+            self.assertTrue(rows.frame.equals(flagged), name)
+        self.assertTrue(FlaggedRows(self.df, [1]).frame.equals(self.df.iloc[[1]]))
+
 if __name__ == "__main__":
     unittest.main()